@@ -0,0 +1,69 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.http_client import HttpClient  # noqa: E402
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b"<html><body>" + b"<p>benchmark paragraph</p>" * 200 + b"</body></html>"
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(name, requests_count, fetch):
+    started = time.perf_counter()
+    fetch()
+    elapsed = time.perf_counter() - started
+    return {"name": name, "requests": requests_count, "seconds": round(elapsed, 4),
+            "requests_per_second": round(requests_count / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP client throughput against a local stand-in server")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.005, help="server-side delay per request, seconds")
+    options = parser.parse_args()
+
+    StandInHandler.latency = options.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    urls = [url] * options.requests
+
+    client = HttpClient(max_connections_per_host=options.workers, fetch_workers=options.workers)
+    results = [
+        measure("bare requests.get", len(urls), lambda: [requests.get(u).content for u in urls]),
+        measure("pooled session", len(urls), lambda: [client.get(u).content for u in urls]),
+        measure("pooled concurrent fetch", len(urls),
+                lambda: list(client.fetch_many(urls, lambda u: client.get(u).content))),
+    ]
+    client.close()
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.job import Job, JobStatus  # noqa: E402
+
+
+def noop():
+    yield
+
+
+class DictJob:
+    # Field layout of Job before __slots__, kept as the comparison baseline
+    def __init__(self, func, job_id, args=None, kwargs=None, start_at=None, dependencies=None):
+        self.func = func
+        self.job_id = job_id
+        self.args = args if args is not None else ()
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.coroutine_factory = lambda: func(*self.args, **self.kwargs)
+        self.start_at = start_at if start_at is not None else time.time()
+        self.max_working_time = -1
+        self.start_time = time.time()
+        self.max_tries = 1
+        self.current_tries = 0
+        self.dependencies = dependencies if dependencies is not None else []
+        self.status = JobStatus.PENDING
+        self.result = None
+        self.error = None
+        self._coroutine = None
+
+
+def bytes_per_job(job_class, count):
+    ids = [f"job-{i}" for i in range(count)]
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    jobs = [job_class(noop, job_id, start_at=0.0) for job_id in ids]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del jobs
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory held per pending job")
+    parser.add_argument("--jobs", type=int, default=100_000)
+    options = parser.parse_args()
+
+    baseline = bytes_per_job(DictJob, options.jobs)
+    compact = bytes_per_job(Job, options.jobs)
+    print(json.dumps({
+        "jobs": options.jobs,
+        "dict_job_bytes_per_job": round(baseline, 1),
+        "slots_job_bytes_per_job": round(compact, 1),
+        "saved_percent": round(100 * (baseline - compact) / baseline, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.job import Job  # noqa: E402
+from src.retry import RetryPolicy  # noqa: E402
+from src.scheduler import Scheduler  # noqa: E402
+
+STEPS_PER_JOB = 10
+
+
+def noop():
+    yield
+
+
+def chatty(steps):
+    for _ in range(steps):
+        yield
+
+
+def fail_once(failed, job_id):
+    if job_id not in failed:
+        failed.add(job_id)
+        raise RuntimeError("transient")
+    yield
+
+
+def run_scheduler(jobs: List[Job], **options) -> float:
+    scheduler = Scheduler(state_file=os.devnull, **options)
+    for job in jobs:
+        scheduler.add_job(job)
+    started = time.perf_counter()
+    scheduler.run()
+    return time.perf_counter() - started
+
+
+def bench_noop(count: int) -> Dict[str, float]:
+    seconds = run_scheduler([Job(noop, f"job-{i}") for i in range(count)])
+    return {"seconds": seconds, "jobs_per_second": count / seconds}
+
+
+def bench_steps(count: int) -> Dict[str, float]:
+    # Scheduling overhead per generator step, one step per dispatch
+    seconds = run_scheduler([Job(chatty, f"job-{i}", args=[STEPS_PER_JOB]) for i in range(count)])
+    return {"seconds": seconds, "us_per_step": seconds / (count * STEPS_PER_JOB) * 1e6}
+
+
+def bench_wide_dag(count: int) -> Dict[str, float]:
+    # One root fanning out to every other job, joined again by a single sink
+    root = Job(noop, "root")
+    middle = [Job(noop, f"job-{i}", dependencies=[root]) for i in range(count - 2)]
+    sink = Job(noop, "sink", dependencies=middle)
+    seconds = run_scheduler([sink, *middle, root])
+    return {"seconds": seconds, "jobs_per_second": count / seconds}
+
+
+def bench_deep_dag(count: int) -> Dict[str, float]:
+    jobs = [Job(noop, "job-0")]
+    for i in range(1, count):
+        jobs.append(Job(noop, f"job-{i}", dependencies=[jobs[-1]]))
+    # Added leaf first, so every job starts out blocked
+    seconds = run_scheduler(list(reversed(jobs)))
+    return {"seconds": seconds, "jobs_per_second": count / seconds}
+
+
+def bench_delayed(count: int) -> Dict[str, float]:
+    # Start times spread over a short window, released from the delayed heap as they come due
+    window = 0.5
+    now = time.time()
+    jobs = [Job(noop, f"job-{i}", start_at=now + window * (i % 1000) / 1000) for i in range(count)]
+    seconds = run_scheduler(jobs)
+    return {"seconds": seconds, "overhead_seconds": max(seconds - window, 0.0), "jobs_per_second": count / seconds}
+
+
+def bench_retry_storm(count: int) -> Dict[str, float]:
+    failed: set = set()
+    jobs = [Job(fail_once, f"job-{i}", args=[failed, f"job-{i}"], max_tries=1) for i in range(count)]
+    seconds = run_scheduler(jobs, retry_policy=RetryPolicy(base_delay=0, jitter=0))
+    return {"seconds": seconds, "retries_per_second": count / seconds}
+
+
+def bench_persistence(count: int) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        state_file = os.path.join(directory, "state.json")
+        scheduler = Scheduler(state_file=state_file)
+        previous = None
+        for i in range(count):
+            # Every tenth job starts a new chain, so the graph has edges without being one long path
+            job = Job(noop, f"job-{i}", start_at=0.0, dependencies=[previous] if previous and i % 10 else None)
+            scheduler.add_job(job)
+            previous = job
+
+        started = time.perf_counter()
+        scheduler.save_jobs()
+        saved = time.perf_counter() - started
+        size = os.path.getsize(state_file)
+
+        restored = Scheduler(state_file=state_file)
+        started = time.perf_counter()
+        restored.load_jobs()
+        loaded = time.perf_counter() - started
+    return {"save_seconds": saved, "load_seconds": loaded, "state_bytes": size}
+
+
+WORKLOADS: Dict[str, Callable[[int], Dict[str, float]]] = {
+    "noop": bench_noop,
+    "steps": bench_steps,
+    "wide_dag": bench_wide_dag,
+    "deep_dag": bench_deep_dag,
+    "delayed": bench_delayed,
+    "retry_storm": bench_retry_storm,
+    "persistence": bench_persistence,
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(workload: Callable[[int], Dict[str, float]], count: int, repeat: int) -> Dict[str, float]:
+    # Each metric is reported as the median of the repeats, plus the best run of the first metric
+    runs = [workload(count) for _ in range(repeat)]
+    result = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    first = next(iter(runs[0]))
+    result[f"best_{first}"] = min(run[first] for run in runs)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler throughput, latency and persistence benchmarks")
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results to this JSON file instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results file; each metric gets its ratio to the baseline")
+    options = parser.parse_args()
+
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline = {(r["workload"], r["jobs"]): r for r in json.load(file)["results"]}
+
+    results = []
+    for name in options.workloads:
+        for count in options.sizes:
+            result = measure(WORKLOADS[name], count, options.repeat)
+            entry = {"workload": name, "jobs": count, **{k: round(v, 6) for k, v in result.items()}}
+            previous = baseline.get((name, count))
+            if previous:
+                entry["vs_baseline"] = {k: round(v / previous[k], 3) for k, v in result.items() if previous.get(k)}
+            results.append(entry)
+            print(f"{name} jobs={count} {result}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "baseline": options.baseline,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": options.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
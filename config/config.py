@@ -16,6 +16,20 @@ class Settings(BaseSettings):
     app_debug_level: str = Field("INFO", env="APP_DEBUG_LEVEL")
     base_dir: str = Field(BASE_DIR)
 
+    # Настройки HTTP клиента
+    http_connect_timeout: float = Field(5.0, env="HTTP_CONNECT_TIMEOUT")
+    http_read_timeout: float = Field(30.0, env="HTTP_READ_TIMEOUT")
+    http_max_connections_per_host: int = Field(10, env="HTTP_MAX_CONNECTIONS_PER_HOST")
+    http_fetch_workers: int = Field(8, env="HTTP_FETCH_WORKERS")
+
+    # Настройки метрик (выключены, если не заданы ни файл, ни порт)
+    metrics_file: str = Field("", env="METRICS_FILE")
+    metrics_port: int = Field(0, env="METRICS_PORT")
+    metrics_export_interval: float = Field(10.0, env="METRICS_EXPORT_INTERVAL")
+
+    # Проверка изменений файла задач, секунды (0 - без перезагрузки)
+    job_file_watch_interval: float = Field(0.0, env="JOB_FILE_WATCH_INTERVAL")
+
     class Config:
         env_file = ENV_FILE_PATH
 
@@ -1,3 +1,10 @@
+import queue
+import atexit
+import logging
+import logging.config
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
 from config.config import settings
 
 LOG_FORMAT = "%(asctime)s - %(name)s -  - [%(filename)s:%(lineno)d] - %(levelname)s - %(message)s"
@@ -35,3 +42,36 @@ LOGGING = {
         "handlers": LOG_DEFAULT_HANDLERS,
     },
 }
+
+_configured = False
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(use_queue: bool = True) -> None:
+    # Applies LOGGING once; with use_queue the root logger only enqueues records and a
+    # background listener thread does the console and file I/O
+    global _configured, _listener
+    if _configured:
+        return
+    logging.config.dictConfig(LOGGING)
+    _configured = True
+    if not use_queue:
+        return
+
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    # Drains queued records before the process exits
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
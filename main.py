@@ -1,9 +1,18 @@
+from config.config import settings
+from config.logger import setup_logging
+from src.metrics import SchedulerMetrics
 from src.task_manager import TaskManager
 
 
 def main():
-    task_manager = TaskManager("job_schedule_example.yaml")
-    task_manager.run()
+    setup_logging()
+    metrics = None
+    if settings.metrics_file or settings.metrics_port:
+        metrics = SchedulerMetrics(settings.metrics_file or None, settings.metrics_export_interval)
+        if settings.metrics_port:
+            metrics.registry.serve(settings.metrics_port)
+    task_manager = TaskManager("job_schedule_example.yaml", metrics=metrics)
+    task_manager.run(watch_interval=settings.job_file_watch_interval or None)
 
 
 if __name__ == "__main__":
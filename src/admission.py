@@ -0,0 +1,81 @@
+import asyncio
+import weakref
+from concurrent.futures import Future, TimeoutError
+from enum import Enum
+from typing import Any, Optional, Sequence
+
+from src.job import Job, JobStatus
+
+
+class AdmissionPolicy(Enum):
+    BLOCK = "block"
+    REJECT = "reject"
+    SPILL = "spill"
+
+
+class SchedulerFullError(RuntimeError):
+    pass
+
+
+class JobHandle:
+    def __init__(self, job: Job) -> None:
+        self.job_id = job.job_id
+        self._job: Optional[Job] = job
+        self._future: Future = Future()
+        # While a job is spilled to disk only its dependency links stay in memory
+        self._spilled_dependencies: Optional[Sequence[Job]] = None
+        # Dependents may still hold the spilled object; it is then reused so there is one object per ID
+        self._spilled_job: Optional[weakref.ref] = None
+
+    @property
+    def job(self) -> Optional[Job]:
+        return self._job
+
+    @property
+    def spilled(self) -> bool:
+        return self._job is None
+
+    @property
+    def status(self) -> JobStatus:
+        return JobStatus.PENDING if self._job is None else self._job.status
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        try:
+            self._future.result(timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    async def wait_async(self) -> Job:
+        return await asyncio.wrap_future(self._future)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        job = self._future.result(timeout=timeout)
+        if job.status == JobStatus.FAILED:
+            raise RuntimeError(f"Job {job.job_id} failed: {job.error}")
+        return job.result
+
+    def _spill(self) -> None:
+        self._spilled_dependencies = self._job.dependencies
+        self._spilled_job = weakref.ref(self._job)
+        self._job = None
+
+    def _live_job(self) -> Optional[Job]:
+        return self._spilled_job() if self._spilled_job is not None else None
+
+    def _restore(self, job: Job) -> None:
+        job.dependencies = self._spilled_dependencies or ()
+        self._spilled_dependencies = None
+        self._spilled_job = None
+        self._job = job
+
+    def _attach(self, job: Job) -> None:
+        # A job claimed back from a shared store is a new object loaded from its record
+        self._job = job
+
+    def _resolve(self) -> None:
+        if not self._future.done():
+            self._future.set_result(self._job)
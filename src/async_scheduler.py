@@ -0,0 +1,136 @@
+import time
+import asyncio
+import functools
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from src import tracing
+from src.job import Job, JobStatus
+from src.journal import JobJournal, JournalEvent
+from src.metrics import SchedulerMetrics
+from src.retry import RetryPolicy
+from src.scheduler import Scheduler
+from src.slicing import SlicePolicy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScheduler(Scheduler):
+    def __init__(
+        self,
+        pool_size: int = 10,
+        state_file: str = "scheduler_state.json",
+        journal: Optional[JobJournal] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        slicing: Optional[SlicePolicy] = None,
+        metrics: Optional[SchedulerMetrics] = None,
+        trace: Optional[tracing.TraceRecorder] = None,
+    ) -> None:
+        super().__init__(
+            pool_size=pool_size,
+            state_file=state_file,
+            journal=journal,
+            retry_policy=retry_policy,
+            slicing=slicing,
+            metrics=metrics,
+            trace=trace,
+        )
+        self._tasks: Set[asyncio.Task] = set()
+        # Task of each dispatched job, so cancel() can stop it
+        self._job_tasks: Dict[str, Tuple[Job, asyncio.Task]] = {}
+
+    def run(self, wait_for_jobs: bool = False) -> None:
+        asyncio.run(self.run_async(wait_for_jobs))
+
+    async def run_async(self, wait_for_jobs: bool = False) -> None:
+        self._start_loop()
+        semaphore = asyncio.Semaphore(self._pool_size)
+        wakeup_source, wakeup = None, None
+        try:
+            while True:
+                self._drain_inbox()
+                if wakeup_source is not self._wakeup:
+                    wakeup_source, wakeup = self._wakeup, asyncio.wrap_future(self._wakeup)
+                if not (self.job_queue or self._delayed_jobs or self._tasks):
+                    if not self._keep_waiting(wait_for_jobs):
+                        break
+                    await wakeup
+                    continue
+                self._release_due_jobs()
+                while self.job_queue:
+                    job = self.job_queue.popleft()
+                    if self.metrics is not None:
+                        self.metrics.job_dispatched(job, self.job_queue.last_wait)
+                    task = asyncio.create_task(self._run_job(job, semaphore))
+                    self._tasks.add(task)
+                    self._job_tasks[job.job_id] = (job, task)
+
+                self._checkpoint(idle=not any(task.done() for task in self._tasks))
+                if self.metrics is not None:
+                    self.metrics.tick()
+                await self._wait_for_tasks(wakeup, wait_for_jobs)
+        finally:
+            self._stop_loop()
+        self._warn_blocked()
+
+    async def _wait_for_tasks(self, wakeup: asyncio.Future, wait_for_jobs: bool) -> None:
+        timeout = self._time_until_next_due_job()
+        if self._tasks:
+            done, _ = await asyncio.wait(self._tasks | {wakeup}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            self._tasks -= done
+        elif wait_for_jobs and not self.job_queue:
+            await asyncio.wait({wakeup}, timeout=timeout)
+        elif timeout:
+            logger.info("No runnable jobs, sleeping %.3f seconds until the next start time", timeout)
+            await asyncio.sleep(timeout)
+
+    def _take_unfinished(self, job_id: str) -> Optional[Job]:
+        job, task = self._job_tasks.pop(job_id, (None, None))
+        if task is None:
+            return super()._take_unfinished(job_id)
+        task.cancel()
+        return job
+
+    async def _run_job(self, job: Job, semaphore: asyncio.Semaphore) -> None:
+        try:
+            if job.status != JobStatus.FAILED:
+                # Otherwise cancelled while waiting in the ready queue
+                await self._run_in_slot(job, semaphore)
+        finally:
+            if self._job_tasks.get(job.job_id, (None, None))[1] is asyncio.current_task():
+                del self._job_tasks[job.job_id]
+
+    async def _run_in_slot(self, job: Job, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            if job.status == JobStatus.PENDING:
+                self._record(JournalEvent.RUNNING, job)
+            if self.trace is not None:
+                self.trace.state(job, "running")
+            job.mark_started()
+            started = job.start_time
+            try:
+                max_steps, time_slice = self._slicing.budget(job)
+                run = job.run_async(max_steps, time_slice, functools.partial(self._slice_finished, job))
+                if job.max_working_time == -1:
+                    result = await run
+                else:
+                    result = await asyncio.wait_for(run, timeout=job.max_working_time)
+            except asyncio.TimeoutError as e:
+                # Timeouts raised by the job itself, e.g. of a socket, are ordinary errors
+                deadline = job.deadline()
+                if deadline is None or time.time() < deadline:
+                    self._retry_or_fail(job, e)
+                    return
+                logger.error("Job %s: Max working time exceeded after %.3f seconds", job.job_id, time.time() - started)
+                self._fail_job(job, "Max working time exceeded")
+            except Exception as e:
+                self._retry_or_fail(job, e)
+            else:
+                self._complete_job(job, result)
+
+    def _slice_finished(self, job: Job, steps: int, seconds: float) -> None:
+        if self._ordering is not None:
+            self._ordering.record_step(job, seconds)
+        self._slicing.record(job, steps, seconds)
+        if self.metrics is not None:
+            self.metrics.step_finished(job, steps, seconds)
@@ -0,0 +1,222 @@
+import logging
+import threading
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Type
+
+from src.job import Job, JobStatus
+from src.utils import func_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class JobExecutor:
+    def submit(self, job: Job, max_steps: int = 1, time_slice: Optional[float] = None) -> Future:
+        # The future's result is the number of steps taken; StopIteration means the job finished
+        raise NotImplementedError
+
+    def cancel(self, future: Future) -> None:
+        # Stop work behind a step that overran its deadline and free the worker it holds
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class SerialExecutor(JobExecutor):
+    def __init__(self, max_workers: int = 1) -> None:
+        self.max_workers = max_workers
+
+    def submit(self, job: Job, max_steps: int = 1, time_slice: Optional[float] = None) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(job.run(max_steps, time_slice))
+        except Exception as e:  # StopIteration signals a finished job
+            future.set_exception(e)
+        return future
+
+
+class ThreadJobExecutor(JobExecutor):
+    def __init__(self, max_workers: int = 10) -> None:
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, job: Job, max_steps: int = 1, time_slice: Optional[float] = None) -> Future:
+        if self._pool is None:
+            logger.info("Starting thread pool with %s workers", self.max_workers)
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        return self._pool.submit(job.run, max_steps, time_slice)
+
+    def cancel(self, future: Future) -> None:
+        if future.cancel() or future.done() or self._pool is None:
+            return
+        # A running thread cannot be interrupted. It is abandoned to finish on its own, and later
+        # steps go to a fresh pool so the stuck worker does not hold a slot
+        logger.warning("Abandoning a worker thread running an overdue step")
+        self._pool.shutdown(wait=False)
+        self._pool = None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+class ParentLogHandler(logging.Handler):
+    # Hands records logged in job processes to the parent's loggers, and so to its handlers
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def run_job_to_completion(
+    func_name: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+    connection: Connection,
+    log_queue: Optional[Any] = None,
+    log_level: int = logging.WARNING,
+) -> None:
+    # Runs in the job's own process; the outcome goes back together with the job's checkpoint, so
+    # progress made before a failure is kept
+    if log_queue is not None:
+        # Inherited handlers may only feed an in-process queue that nothing reads here
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(log_level)
+    checkpoint = kwargs.get("checkpoint")
+    try:
+        func = func_resolver(func_name)
+        if func is None:
+            raise ValueError(f"Unknown function: {func_name}")
+        outcome: Tuple[str, Any] = ("done", list(func(*args, **kwargs)))
+    except Exception as e:
+        outcome = ("error", e)
+    try:
+        connection.send((*outcome, checkpoint))
+    except Exception as e:
+        # Results or errors that cannot be pickled
+        connection.send(("error", RuntimeError(f"{type(e).__name__}: {e}"), checkpoint))
+    finally:
+        connection.close()
+
+
+class ProcessJobExecutor(JobExecutor):
+    # Jobs are shipped by function name and run to completion in a process of their own, at most
+    # max_workers at a time, since generators cannot be stepped across the process boundary.
+    # Cancelling a job terminates its process only.
+    def __init__(self, max_workers: int = 10) -> None:
+        self.max_workers = max_workers
+        # Each runner thread starts one job process and waits for its outcome
+        self._runners: Optional[ThreadPoolExecutor] = None
+        self._processes: Dict[Future, multiprocessing.Process] = {}
+        self._cancelled: Set[Future] = set()
+        self._lock = threading.Lock()
+        # Log records of job processes come back through this queue
+        self._log_queue: Optional[Any] = None
+        self._log_listener: Optional[QueueListener] = None
+
+    def submit(self, job: Job, max_steps: int = 1, time_slice: Optional[float] = None) -> Future:
+        job.update_status(JobStatus.RUNNING)
+        if self._runners is None:
+            self._runners = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-process")
+            self._log_queue = multiprocessing.Queue()
+            self._log_listener = QueueListener(self._log_queue, ParentLogHandler())
+            self._log_listener.start()
+        args, kwargs = job.resolve_inputs()
+        # Streams over upstream results cannot cross the process boundary and are read in full here
+        args = [list(arg) if isinstance(arg, Iterator) else arg for arg in args]
+        kwargs = {name: list(value) if isinstance(value, Iterator) else value for name, value in kwargs.items()}
+        future: Future = Future()
+        self._runners.submit(self._run, future, job, args, kwargs)
+        return future
+
+    def _run(self, future: Future, job: Job, args: List[Any], kwargs: Dict[str, Any]) -> None:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=run_job_to_completion,
+            args=(job.func_name, args, kwargs, sender, self._log_queue, logging.getLogger().getEffectiveLevel()),
+            name=f"job-{job.job_id}",
+        )
+        with self._lock:
+            if future in self._cancelled:
+                self._cancelled.discard(future)
+                return
+            try:
+                process.start()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            self._processes[future] = process
+        sender.close()
+        try:
+            outcome = receiver.recv()
+        except EOFError:
+            # Terminated, or died without reporting
+            outcome = None
+        finally:
+            receiver.close()
+            process.join()
+            with self._lock:
+                del self._processes[future]
+                cancelled = future in self._cancelled
+                self._cancelled.discard(future)
+        if not cancelled:
+            self._settle(future, job, outcome, process.exitcode)
+
+    def _settle(self, future: Future, job: Job, outcome: Optional[Tuple[str, Any, Any]], exitcode: int) -> None:
+        if outcome is None:
+            future.set_exception(RuntimeError(f"Process of job {job.job_id} exited with code {exitcode}"))
+            return
+        status, value, checkpoint = outcome
+        if checkpoint is not None and job.checkpoint is not None:
+            job.checkpoint.clear()
+            job.checkpoint.update(checkpoint)
+        if status == "error":
+            future.set_exception(value)
+            return
+        for result in value:
+            job.emit(result)
+        if job.results is not None:
+            job.results.close()
+        future.set_exception(StopIteration(value))
+
+    def cancel(self, future: Future) -> None:
+        if future.done():
+            return
+        with self._lock:
+            # A job still waiting for a runner is never started
+            self._cancelled.add(future)
+            process = self._processes.get(future)
+        if process is not None:
+            logger.warning("Terminating process %s of a cancelled job", process.pid)
+            process.terminate()
+
+    def shutdown(self) -> None:
+        if self._runners is not None:
+            self._runners.shutdown(wait=True)
+            self._runners = None
+            # Every job process has exited, so their records are all queued
+            self._log_listener.stop()
+            self._log_queue.close()
+            self._log_listener = self._log_queue = None
+
+
+EXECUTORS: Dict[str, Type[JobExecutor]] = {
+    "serial": SerialExecutor,
+    "thread": ThreadJobExecutor,
+    "process": ProcessJobExecutor,
+}
+
+
+def check_executor(name: Optional[str]) -> None:
+    if name is not None and name not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {name}")
+
+
+def create_executor(name: str, max_workers: int) -> JobExecutor:
+    check_executor(name)
+    return EXECUTORS[name](max_workers=max_workers)
@@ -0,0 +1,63 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        fetch_workers: int = 8,
+    ) -> None:
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.fetch_workers = fetch_workers
+        self.session = requests.Session()
+        # One keep-alive pool per host; pool_block caps concurrent connections to a host instead of opening extras
+        adapter = HTTPAdapter(pool_maxsize=max_connections_per_host, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def fetch_many(
+        self, items: Iterable[Any], fetch: Callable[[Any], Any], max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[Any, Any]]:
+        # Runs fetch(item) concurrently and yields (item, result) as each finishes; errors are re-raised
+        with ThreadPoolExecutor(max_workers=max_workers or self.fetch_workers, thread_name_prefix="http-fetch") as pool:
+            futures = {pool.submit(fetch, item): item for item in items}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                logger.info("Creating shared HTTP client")
+                _client = HttpClient(
+                    max_connections_per_host=settings.http_max_connections_per_host,
+                    connect_timeout=settings.http_connect_timeout,
+                    read_timeout=settings.http_read_timeout,
+                    fetch_workers=settings.http_fetch_workers,
+                )
+    return _client
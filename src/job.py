@@ -1,12 +1,16 @@
 import time
 import json
-import logging.config
+import asyncio
+import inspect
+import logging
+from functools import lru_cache
 from enum import Enum, auto
-from typing import Callable, Any, Sequence, Optional, Dict
+from typing import Callable, Any, Sequence, Optional, Dict, Iterator, List, Tuple
 
-from config.logger import LOGGING
+from src import tracing
+from src.results import RESULTS_OF, ResultChannel, RingBufferChannel, create_channel, is_results_reference
+from src.retry import RetryPolicy
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
@@ -26,10 +30,46 @@ SERIALIZABLE_FIELDS = {
     "max_working_time",
     "max_tries",
     "current_tries",
+    "executor",
+    "priority",
+    "queue",
 }
 
 
+@lru_cache(maxsize=None)
+def accepts_checkpoint(func: Callable) -> bool:
+    try:
+        return "checkpoint" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
 class Job:
+    # A million pending jobs should not each carry a __dict__
+    __slots__ = (
+        "func",
+        "job_id",
+        "args",
+        "kwargs",
+        "start_at",
+        "max_working_time",
+        "start_time",
+        "max_tries",
+        "current_tries",
+        "dependencies",
+        "executor",
+        "priority",
+        "queue",
+        "retry_policy",
+        "results",
+        "checkpoint",
+        "status",
+        "result",
+        "error",
+        "__coroutine",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         func: Callable,
@@ -37,27 +77,90 @@ class Job:
         args: Optional[Sequence[Any]] = None,
         kwargs: Optional[Dict[str, Any]] = None,
         start_at: Optional[float] = None,
-        max_working_time: int = -1,
+        max_working_time: float = -1,
         max_tries: int = 1,
         dependencies: Optional[Sequence["Job"]] = None,
+        executor: Optional[str] = None,
+        priority: int = 0,
+        queue: str = "default",
+        retry_policy: Optional[RetryPolicy] = None,
+        results: Optional[ResultChannel] = None,
     ):
         self.func = func
         self.job_id = job_id
         self.args = args if args is not None else ()
         self.kwargs = kwargs if kwargs is not None else {}
-        self.coroutine_factory = lambda: func(*self.args, **self.kwargs)
         self.start_at = start_at if start_at is not None else time.time()
         self.max_working_time = max_working_time
-        self.start_time = time.time()
+        # Set when the current try is first dispatched; max_working_time counts from here
+        self.start_time: Optional[float] = None
         self.max_tries = max_tries
         self.current_tries = 0
-        self.dependencies = dependencies if dependencies is not None else []
+        self.dependencies: Sequence["Job"] = tuple(dependencies) if dependencies else ()
+        # Executor name overriding the scheduler default, e.g. "process" for CPU-bound jobs
+        self.executor = executor
+        # Higher priority runs first within its named queue
+        self.priority = priority
+        self.queue = queue
+        # Backoff between tries and which errors are retried; the scheduler default applies when unset
+        self.retry_policy = retry_policy
+        # Yielded values; only kept when a channel is given or a dependent reads them with results_of()
+        self.results = results
+        # Progress a function taking a `checkpoint` argument keeps across tries and restarts
+        self.checkpoint: Optional[Dict[str, Any]] = None
         self.status = JobStatus.PENDING
         self.result = None
         self.error = None
         self.__coroutine = None
+        self.open_upstream_channels()
+
+    @property
+    def func_name(self) -> str:
+        return self.func.__name__
+
+    def coroutine_factory(self) -> Any:
+        args, kwargs = self.resolve_inputs()
+        return self.func(*args, **kwargs)
+
+    def resolve_inputs(self) -> Tuple[List[Any], Dict[str, Any]]:
+        # Arguments made with results_of() become lazy streams over a dependency's results
+        args = [self._resolve_input(arg) for arg in self.args]
+        kwargs = {name: self._resolve_input(value) for name, value in self.kwargs.items()}
+        if accepts_checkpoint(self.func) and "checkpoint" not in kwargs:
+            if self.checkpoint is None:
+                self.checkpoint = {}
+            kwargs["checkpoint"] = self.checkpoint
+        return args, kwargs
+
+    def results_dependencies(self) -> List["Job"]:
+        references = [value[RESULTS_OF] for value in [*self.args, *self.kwargs.values()] if is_results_reference(value)]
+        return [dependency for dependency in self.dependencies if dependency.job_id in references]
+
+    def open_upstream_channels(self) -> None:
+        # Dependencies whose results this job reads keep them in a ring buffer unless they have a channel
+        for dependency in self.results_dependencies():
+            if dependency.results is None:
+                dependency.results = RingBufferChannel()
+                dependency.results.lost = dependency.status == JobStatus.COMPLETED
+
+    def _resolve_input(self, value: Any) -> Any:
+        if not is_results_reference(value):
+            return value
+        for dependency in self.dependencies:
+            if dependency.job_id == value[RESULTS_OF]:
+                return dependency.stream_results()
+        raise ValueError(f"Job {self.job_id} reads results of {value[RESULTS_OF]}, which is not a dependency")
+
+    def emit(self, value: Any) -> None:
+        if value is None:
+            return
+        if self.results is not None:
+            self.results.put(value)
+
+    def stream_results(self) -> Iterator[Any]:
+        return self.results.stream() if self.results is not None else iter(())
 
-    def update_status(self, new_status: JobStatus, result: Optional[str] = None, error: Optional[str] = None) -> None:
+    def update_status(self, new_status: JobStatus, result: Optional[Any] = None, error: Optional[str] = None) -> None:
         self.status = new_status
         self.result = result
         self.error = error
@@ -65,38 +168,110 @@ class Job:
     def can_retry(self) -> bool:
         return self.current_tries < self.max_tries
 
-    def run(self) -> None:
-        logger.info("Job %s: Starts", self.job_id)
+    def run(self, max_steps: int = 1, time_slice: Optional[float] = None) -> int:
+        logger.debug("Job %s: Starts", self.job_id)
 
-        if not self.is_runnable():
-            logger.info("Job is not runnable will be back to queue func name %s", self.func.__name__)
-            return
+        # Dependencies and start time only gate the first step
+        if self.__coroutine is None and not self.is_runnable():
+            logger.debug("Job is not runnable will be back to queue func name %s", self.func_name)
+            return 0
 
         self.update_status(JobStatus.RUNNING)
 
         if self.__coroutine is None:
             self.__coroutine = self.coroutine_factory()
 
+        tracer = tracing.active_tracer
+        profiler = tracer.profiler_for(self) if tracer is not None else None
+        if profiler is not None:
+            profiler.enable()
+        # Several steps per dispatch spare the scheduler a round trip for every yielded value
+        slice_end = time.perf_counter() + time_slice if time_slice is not None else None
+        steps = 0
         try:
-            self.__coroutine.send(None)
+            while True:
+                if tracer is None:
+                    self.emit(self.__coroutine.send(None))
+                else:
+                    self.emit(tracer.step(self, self.__coroutine))
+                steps += 1
+                if steps >= max_steps or (slice_end is not None and time.perf_counter() >= slice_end):
+                    return steps
         except StopIteration:
+            if self.results is not None:
+                self.results.close()
             raise
-        except Exception as e:
-            raise e
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                tracer.add_profile(self, profiler)
+
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.func)
+
+    async def run_async(
+        self,
+        max_steps: int = 1,
+        time_slice: Optional[float] = None,
+        on_slice: Optional[Callable[[int, float], None]] = None,
+    ) -> Any:
+        # on_slice(steps, seconds) is called after every slice, like a dispatch of the threaded scheduler;
+        # an async function runs as one slice of one step
+        if self.is_async():
+            logger.info("Job %s: Starts", self.job_id)
+            self.update_status(JobStatus.RUNNING)
+            args, kwargs = self.resolve_inputs()
+            started, steps = time.perf_counter(), 0
+            try:
+                result = await self.func(*args, **kwargs)
+                steps = 1
+                return result
+            finally:
+                if on_slice is not None:
+                    on_slice(steps, time.perf_counter() - started)
+
+        # Generator jobs are stepped on the loop, yielding control between steps
+        try:
+            while True:
+                started, steps = time.perf_counter(), 0
+                try:
+                    steps = self.run(max_steps, time_slice)
+                finally:
+                    if on_slice is not None:
+                        on_slice(steps, time.perf_counter() - started)
+                await asyncio.sleep(0)
+        except StopIteration as stop:
+            return stop.value
+
+    def mark_started(self) -> None:
+        if self.start_time is None:
+            self.start_time = time.time()
+
+    def deadline(self) -> Optional[float]:
+        if self.max_working_time == -1 or self.start_time is None:
+            return None
+        return self.start_time + self.max_working_time
 
     def has_exceeded_max_time(self) -> bool:
-        if self.max_working_time == -1:
-            return False
-        return (time.time() - self.start_time) > self.max_working_time
+        deadline = self.deadline()
+        return deadline is not None and time.time() > deadline
 
     def restart_coroutine(self) -> None:
         logger.info("Job %s re-start", self.job_id)
         self.__coroutine = None
+        self.start_time = None
+        # Results of the failed try are not mixed into the next one
+        if self.results is not None:
+            self.results.clear()
 
     def close_coroutine(self) -> None:
         if self.__coroutine:
             logger.info("Closing coroutine for Job %s", self.job_id)
-            self.__coroutine.close()
+            try:
+                self.__coroutine.close()
+            except ValueError:
+                # Still executing in an abandoned worker thread, which drops it when the step returns
+                logger.warning("Job %s: Coroutine is still running and is abandoned", self.job_id)
             self.__coroutine = None
 
     def is_start_time_reached(self) -> bool:
@@ -111,7 +286,7 @@ class Job:
     def has_failed_dependency(self) -> bool:
         return any(job.status == JobStatus.FAILED for job in self.dependencies)
 
-    def serialize(self) -> str:
+    def to_record(self) -> Dict[str, Any]:
         data = {}
         for field in SERIALIZABLE_FIELDS:
             if hasattr(self, field):
@@ -123,16 +298,43 @@ class Job:
                     data[field] = getattr(self, field)
 
         if hasattr(self, "func") and callable(self.func):
-            data["func_name"] = self.func.__name__
+            data["func_name"] = self.func_name
 
+        # Dependencies are referenced by ID; the graph serializer writes each of them once
         if self.dependencies:
-            data["dependencies"] = [dep.serialize() for dep in self.dependencies]
+            data["dependency_ids"] = [dep.job_id for dep in self.dependencies]
+
+        if self.retry_policy is not None:
+            data["retry_policy"] = self.retry_policy.to_record()
 
-        return json.dumps(data)
+        if self.results is not None:
+            data["results"] = self.results.to_record()
+
+        if self.checkpoint:
+            data["checkpoint"] = self.checkpoint
+
+        return data
+
+    def serialize(self) -> str:
+        return json.dumps(self.to_record())
+
+    def link_dependencies(self, dependency_ids: Sequence[str], job_registry: "JobRegistry") -> None:
+        dependencies = list(self.dependencies)
+        for dep_id in dependency_ids:
+            dependency = job_registry.get_job(dep_id)
+            if dependency is None:
+                logger.warning("Job %s: Unknown dependency %s is ignored", self.job_id, dep_id)
+                continue
+            dependencies.append(dependency)
+        self.dependencies = tuple(dependencies)
+        self.open_upstream_channels()
 
     @staticmethod
     def create_from_data(
-        data: Dict[str, Any], func_resolver: Callable[[str], Callable], job_registry: "JobRegistry"
+        data: Dict[str, Any],
+        func_resolver: Callable[[str], Callable],
+        job_registry: "JobRegistry",
+        link_dependencies: bool = True,
     ) -> "Job":
         job_id = data["job_id"]
         existing_job = job_registry.get_job(job_id)
@@ -140,6 +342,7 @@ class Job:
             return existing_job
 
         func = func_resolver(data["func_name"])
+        # Records written before the flat format embed their dependencies recursively
         dependencies_data = data.get("dependencies", [])
         dependencies = []
         for dep_data in dependencies_data:
@@ -156,9 +359,20 @@ class Job:
             max_working_time=data["max_working_time"],
             max_tries=data["max_tries"],
             dependencies=dependencies,
+            executor=data.get("executor"),
+            priority=data.get("priority", 0),
+            queue=data.get("queue", "default"),
+            retry_policy=RetryPolicy.from_record(data.get("retry_policy")),
+            results=create_channel(data.get("results")),
         )
         job.status = JobStatus[data["status"]]
+        if job.status == JobStatus.COMPLETED and isinstance(job.results, RingBufferChannel):
+            # Only the channel's settings are saved
+            job.results.lost = True
         job.current_tries = data["current_tries"]
+        job.checkpoint = data.get("checkpoint")
+        if link_dependencies:
+            job.link_dependencies(data.get("dependency_ids", []), job_registry)
 
         # Register the new job
         job_registry.register_job(job)
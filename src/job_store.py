@@ -0,0 +1,238 @@
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.job import Job, JobStatus
+from src.results import FileChannel
+from src.serialization import collect_graph
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_at REAL NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    unmet INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    job_id TEXT NOT NULL,
+    dependency_id TEXT NOT NULL,
+    PRIMARY KEY (dependency_id, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, unmet, start_at);
+"""
+
+
+class JobStore:
+    # Job table shared by scheduler workers in several processes or on several hosts of one
+    # filesystem, in SQLite WAL mode. Workers claim runnable jobs under a lease they keep renewing;
+    # the lease of a job whose worker died runs out and another worker claims the job again,
+    # starting it from scratch. Each job counts its unfinished dependencies, so a completion
+    # anywhere unblocks its dependents for every worker, and a failure fails them in the store.
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 30.0,
+        poll_interval: float = 0.5,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        # Autocommit, so write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._connection = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def _write(self, statements: Any) -> Any:
+        # Runs statements(cursor) in one write transaction; the write lock is taken up front so two
+        # workers never both read the same runnable jobs and then race to upgrade
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cursor)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def _read(self, query: str, parameters: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._connection.execute(query, tuple(parameters)).fetchall()
+
+    def add(self, job: Job) -> None:
+        # Dependencies are added first; jobs already in the store keep their stored state
+        jobs = collect_graph([job])
+        for each in jobs:
+            # Another worker may run the consumer, and memory channels do not leave the producing process
+            for dependency in each.results_dependencies():
+                if not isinstance(dependency.results, FileChannel):
+                    raise ValueError(
+                        f"Job {each.job_id} reads results of {dependency.job_id} from another worker,"
+                        " which needs a FileChannel"
+                    )
+        self._write(lambda cursor: [self._insert(cursor, each) for each in jobs])
+
+    def _insert(self, cursor: sqlite3.Cursor, job: Job) -> None:
+        if cursor.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job.job_id,)).fetchone():
+            return
+        status, error, unmet = job.status.name, job.error, 0
+        if status not in (JobStatus.COMPLETED.name, JobStatus.FAILED.name):
+            status = JobStatus.PENDING.name
+            for dependency in job.dependencies:
+                row = cursor.execute("SELECT status FROM jobs WHERE job_id = ?", (dependency.job_id,)).fetchone()
+                if row[0] == JobStatus.FAILED.name:
+                    status, error = JobStatus.FAILED.name, "Dependency failed"
+                elif row[0] != JobStatus.COMPLETED.name:
+                    unmet += 1
+        cursor.execute(
+            "INSERT INTO jobs (job_id, record, status, start_at, priority, unmet, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.serialize(), status, job.start_at, job.priority, unmet, error),
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO dependencies (job_id, dependency_id) VALUES (?, ?)",
+            [(job.job_id, dependency.job_id) for dependency in job.dependencies],
+        )
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        # Runnable jobs and jobs whose lease has run out, highest priority first
+        def statements(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+            now = time.time()
+            rows = cursor.execute(
+                "SELECT job_id, record, status FROM jobs"
+                " WHERE (status = ? AND unmet = 0 AND start_at <= ?) OR (status = ? AND lease_expires < ?)"
+                " ORDER BY priority DESC, start_at LIMIT ?",
+                (JobStatus.PENDING.name, now, JobStatus.RUNNING.name, now, limit),
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ? WHERE job_id = ?",
+                [(JobStatus.RUNNING.name, self.worker_id, now + self.lease_seconds, row[0]) for row in rows],
+            )
+            return rows
+
+        records = []
+        for job_id, record, status in self._write(statements):
+            if status == JobStatus.RUNNING.name:
+                logger.warning("Job %s: Lease expired, reclaimed by worker %s", job_id, self.worker_id)
+            records.append(json.loads(record))
+        return records
+
+    def renew(self, job_ids: Iterable[str]) -> int:
+        # Returns how many of the leases this worker still held
+        job_ids = list(job_ids)
+        expires = time.time() + self.lease_seconds
+        return self._write(lambda cursor: cursor.executemany(
+            "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND lease_owner = ? AND status = ?",
+            [(expires, job_id, self.worker_id, JobStatus.RUNNING.name) for job_id in job_ids],
+        ).rowcount)
+
+    def _finish(self, cursor: sqlite3.Cursor, job: Job, status: JobStatus, error: Optional[str] = None) -> bool:
+        # Only the lease holder may finish a job; a worker that lost its lease leaves it to the new owner
+        return cursor.execute(
+            "UPDATE jobs SET record = ?, status = ?, error = ?, lease_owner = NULL, lease_expires = NULL"
+            " WHERE job_id = ? AND lease_owner = ? AND status = ?",
+            (job.serialize(), status.name, error, job.job_id, self.worker_id, JobStatus.RUNNING.name),
+        ).rowcount == 1
+
+    def complete(self, job: Job) -> bool:
+        def statements(cursor: sqlite3.Cursor) -> bool:
+            if not self._finish(cursor, job, JobStatus.COMPLETED):
+                return False
+            cursor.execute(
+                "UPDATE jobs SET unmet = unmet - 1"
+                " WHERE job_id IN (SELECT job_id FROM dependencies WHERE dependency_id = ?)",
+                (job.job_id,),
+            )
+            return True
+
+        return self._lease_kept(job, self._write(statements))
+
+    def fail(self, job: Job, error: str) -> bool:
+        def statements(cursor: sqlite3.Cursor) -> bool:
+            if not self._finish(cursor, job, JobStatus.FAILED, error):
+                return False
+            failed = [job.job_id]
+            while failed:
+                dependents = [row[0] for row in cursor.execute(
+                    "SELECT d.job_id FROM dependencies d JOIN jobs j ON j.job_id = d.job_id"
+                    " WHERE d.dependency_id = ? AND j.status = ?",
+                    (failed.pop(), JobStatus.PENDING.name),
+                )]
+                cursor.executemany(
+                    "UPDATE jobs SET status = ?, error = ? WHERE job_id = ?",
+                    [(JobStatus.FAILED.name, "Dependency failed", dependent) for dependent in dependents],
+                )
+                failed.extend(dependents)
+            return True
+
+        return self._lease_kept(job, self._write(statements))
+
+    def retry(self, job: Job) -> bool:
+        # Hands the job back for its next try at job.start_at, on whichever worker claims it then
+        def statements(cursor: sqlite3.Cursor) -> bool:
+            return cursor.execute(
+                "UPDATE jobs SET record = ?, status = ?, start_at = ?, lease_owner = NULL, lease_expires = NULL"
+                " WHERE job_id = ? AND lease_owner = ? AND status = ?",
+                (job.serialize(), JobStatus.PENDING.name, job.start_at, job.job_id, self.worker_id,
+                 JobStatus.RUNNING.name),
+            ).rowcount == 1
+
+        return self._lease_kept(job, self._write(statements))
+
+    def release(self, job_ids: Iterable[str]) -> None:
+        # Gives claimed jobs back without waiting for their leases to run out, e.g. on shutdown
+        self._write(lambda cursor: cursor.executemany(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL"
+            " WHERE job_id = ? AND lease_owner = ? AND status = ?",
+            [(JobStatus.PENDING.name, job_id, self.worker_id, JobStatus.RUNNING.name) for job_id in job_ids],
+        ))
+
+    def _lease_kept(self, job: Job, kept: bool) -> bool:
+        if not kept:
+            logger.warning("Job %s: Lease was lost, the result of worker %s is dropped", job.job_id, self.worker_id)
+        return kept
+
+    def records(self, job_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        records = []
+        for job_id in job_ids:
+            for record, status, error in self._read(
+                "SELECT record, status, error FROM jobs WHERE job_id = ?", (job_id,)
+            ):
+                records.append(dict(json.loads(record), status=status, error=error))
+        return records
+
+    def finished(self, job_ids: Iterable[str]) -> Dict[str, Tuple[JobStatus, Optional[str]]]:
+        finished = {}
+        for job_id in job_ids:
+            for status, error in self._read("SELECT status, error FROM jobs WHERE job_id = ?", (job_id,)):
+                if status in (JobStatus.COMPLETED.name, JobStatus.FAILED.name):
+                    finished[job_id] = (JobStatus[status], error)
+        return finished
+
+    def has_unfinished(self) -> bool:
+        return bool(self._read(
+            "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", (JobStatus.PENDING.name, JobStatus.RUNNING.name)
+        ))
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._read("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
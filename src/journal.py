@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import logging
+import threading
+from enum import Enum
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+from src.job import Job
+from src.serialization import parse_graph, serialize_graph
+
+logger = logging.getLogger(__name__)
+
+
+class JournalEvent(Enum):
+    ENQUEUED = "enqueued"
+    RUNNING = "running"
+    RETRY = "retry"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+EVENT_STATUSES = {
+    JournalEvent.RUNNING: "RUNNING",
+    JournalEvent.COMPLETED: "COMPLETED",
+    JournalEvent.FAILED: "FAILED",
+}
+
+
+class JobJournal:
+    def __init__(
+        self,
+        snapshot_file: str,
+        commit_interval: float = 0.05,
+        commit_batch: int = 1000,
+        compact_every: int = 100_000,
+    ) -> None:
+        self.snapshot_file = snapshot_file
+        self.wal_file = snapshot_file + ".wal"
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self.compact_every = compact_every
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        self._last_commit = time.time()
+        self._records_since_snapshot = 0
+
+    def record(self, event: JournalEvent, job: Job) -> None:
+        entry: Dict[str, Any] = {"event": event.value, "job_id": job.job_id}
+        if event == JournalEvent.ENQUEUED:
+            entry["job"] = job.to_record()
+        elif event == JournalEvent.RETRY:
+            entry["current_tries"] = job.current_tries
+            entry["start_at"] = job.start_at
+            if job.checkpoint:
+                entry["checkpoint"] = job.checkpoint
+        elif event == JournalEvent.FAILED:
+            entry["error"] = job.error
+        line = json.dumps(entry)
+
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.commit_batch or time.time() - self._last_commit >= self.commit_interval:
+                self._commit()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        # Group commit: one write and one fsync for every buffered transition
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.wal_file, "a")
+        self._file.write("\n".join(self._buffer) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._records_since_snapshot += len(self._buffer)
+        self._buffer.clear()
+        self._last_commit = time.time()
+
+    def needs_compaction(self) -> bool:
+        return self._records_since_snapshot + len(self._buffer) >= self.compact_every
+
+    def compact(self, jobs: Iterable[Job]) -> None:
+        with self._lock:
+            self._buffer.clear()
+            tmp_file = self.snapshot_file + ".tmp"
+            with open(tmp_file, "w") as file:
+                file.write(serialize_graph(jobs))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.wal_file, "w")
+            self._records_since_snapshot = 0
+            self._last_commit = time.time()
+        logger.info("Journal compacted into snapshot %s", self.snapshot_file)
+
+    def replay(self) -> List[Dict[str, Any]]:
+        records: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r") as file:
+                for data in parse_graph(file.read()):
+                    records[data["job_id"]] = data
+
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, "r") as file:
+                lines = file.read().split("\n")
+            for number, line in enumerate(lines, start=1):
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final record is expected after a crash mid-write
+                    logger.warning("Skipping unreadable journal record at %s:%s", self.wal_file, number)
+                    continue
+                self._apply(records, entry)
+
+        return list(records.values())
+
+    @staticmethod
+    def _apply(records: Dict[str, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        event = JournalEvent(entry["event"])
+        if event == JournalEvent.ENQUEUED:
+            records[entry["job_id"]] = entry["job"]
+            return
+
+        data = records.get(entry["job_id"])
+        if data is None:
+            return
+        if event == JournalEvent.RETRY:
+            data["current_tries"] = entry["current_tries"]
+            data["start_at"] = entry["start_at"]
+            if "checkpoint" in entry:
+                data["checkpoint"] = entry["checkpoint"]
+            data["status"] = "PENDING"
+        else:
+            data["status"] = EVENT_STATUSES[event]
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
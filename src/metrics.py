@@ -0,0 +1,187 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0)
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    # Counters, histograms and callback gauges rendered in the Prometheus text format
+    def __init__(self) -> None:
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0) -> None:
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram()
+        histogram.observe(value)
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        self._gauges[name] = read
+
+    def counter_value(self, name: str, labels: Labels = ()) -> float:
+        return self._counters.get(name, {}).get(labels, 0.0)
+
+    def histogram(self, name: str, labels: Labels = ()) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(labels)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, read in list(self._gauges.items()):
+            self._header(lines, name)
+            lines.append(f"{name} {read()}")
+        for name, series in list(self._counters.items()):
+            self._header(lines, name)
+            for labels, value in list(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name, series in list(self._histograms.items()):
+            self._header(lines, name)
+            for labels, histogram in list(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    bucket_label = f'le="{le}"'
+                    lines.append(f"{name}_bucket{_format_labels(labels, bucket_label)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str) -> None:
+        kind, help_text = self._help.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def write(self, path: str) -> None:
+        # Written aside and renamed, so a collector never reads a half-written file
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "w") as file:
+            file.write(self.render())
+        os.replace(tmp_file, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> int:
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, self._server.server_port)
+        return self._server.server_port
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class SchedulerMetrics:
+    # Scheduler hooks in terms of jobs; series are labelled by function name so their number stays small
+    def __init__(self, export_file: Optional[str] = None, export_interval: float = 10.0) -> None:
+        self.registry = MetricsRegistry()
+        self.export_file = export_file
+        self.export_interval = export_interval
+        self._last_export = time.time()
+        self._enqueued_at: Dict[str, float] = {}
+        for name, kind, help_text in (
+            ("scheduler_ready_jobs", "gauge", "Jobs waiting in the ready queue"),
+            ("scheduler_delayed_jobs", "gauge", "Jobs waiting for their start time or retry backoff"),
+            ("scheduler_blocked_jobs", "gauge", "Jobs waiting on dependencies"),
+            ("scheduler_running_jobs", "gauge", "Jobs with a step in flight"),
+            ("job_steps_total", "counter", "Generator steps run"),
+            ("job_retries_total", "counter", "Retries scheduled"),
+            ("job_finished_total", "counter", "Jobs finished, by final status"),
+            ("job_dispatch_seconds", "histogram", "Time from dispatch to the result of a step batch"),
+            ("job_queue_wait_seconds", "histogram", "Time spent in the ready queue before a dispatch"),
+            ("job_completion_seconds", "histogram", "Time from enqueue to completion"),
+        ):
+            self.registry.describe(name, kind, help_text)
+
+    def watch(self, ready: Callable[[], float], delayed: Callable[[], float], blocked: Callable[[], float],
+              running: Callable[[], float]) -> None:
+        self.registry.gauge("scheduler_ready_jobs", ready)
+        self.registry.gauge("scheduler_delayed_jobs", delayed)
+        self.registry.gauge("scheduler_blocked_jobs", blocked)
+        self.registry.gauge("scheduler_running_jobs", running)
+
+    def job_enqueued(self, job: Job) -> None:
+        self._enqueued_at.setdefault(job.job_id, time.time())
+
+    def job_dispatched(self, job: Job, queue_wait: float) -> None:
+        self.registry.observe("job_queue_wait_seconds", queue_wait, (("function", job.func_name),))
+
+    def step_finished(self, job: Job, steps: int, seconds: float) -> None:
+        labels = (("function", job.func_name),)
+        self.registry.inc("job_steps_total", labels, steps)
+        self.registry.observe("job_dispatch_seconds", seconds, labels)
+
+    def job_retried(self, job: Job) -> None:
+        self.registry.inc("job_retries_total", (("function", job.func_name),))
+
+    def job_finished(self, job: Job) -> None:
+        status = "completed" if job.status == JobStatus.COMPLETED else "failed"
+        self.registry.inc("job_finished_total", (("function", job.func_name), ("status", status)))
+        enqueued_at = self._enqueued_at.pop(job.job_id, None)
+        if enqueued_at is not None and status == "completed":
+            self.registry.observe("job_completion_seconds", time.time() - enqueued_at, (("function", job.func_name),))
+
+    def tick(self, force: bool = False) -> None:
+        if self.export_file is None:
+            return
+        now = time.time()
+        if force or now - self._last_export >= self.export_interval:
+            self._last_export = now
+            self.registry.write(self.export_file)
@@ -0,0 +1,88 @@
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+class CriticalPathPolicy:
+    # Ranks a job by the longest chain of estimated work that it unblocks, itself included.
+    # Estimates are smoothed per function name and can be kept in a history file across runs.
+    def __init__(
+        self,
+        default_duration: float = 1.0,
+        smoothing: float = 0.3,
+        history_file: Optional[str] = None,
+    ) -> None:
+        self.default_duration = default_duration
+        self.smoothing = smoothing
+        self.history_file = history_file
+        self.durations: Dict[str, float] = {}
+        self._dependents: Dict[str, List[Job]] = {}
+        self._ranks: Dict[str, float] = {}
+        self._busy: Dict[str, float] = {}
+        # Bumped whenever cached ranks are dropped, so queues know to re-rank waiting jobs
+        self.version = 0
+        if history_file and os.path.exists(history_file):
+            with open(history_file, "r") as file:
+                self.durations = json.load(file)
+
+    def add(self, job: Job) -> None:
+        for dependency in job.dependencies:
+            self._dependents.setdefault(dependency.job_id, []).append(job)
+        if job.dependencies:
+            # Upstream ranks change with the new edge
+            self._invalidate()
+
+    def estimate(self, func_name: str) -> float:
+        return self.durations.get(func_name, self.default_duration)
+
+    def rank(self, job: Job) -> float:
+        rank = self._ranks.get(job.job_id)
+        if rank is not None:
+            return rank
+
+        stack: List[Tuple[Job, bool]] = [(job, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node.job_id in self._ranks:
+                continue
+            dependents = self._dependents.get(node.job_id, ())
+            if expanded:
+                downstream = max((self._ranks.get(dependent.job_id, 0.0) for dependent in dependents), default=0.0)
+                self._ranks[node.job_id] = self.estimate(node.func_name) + downstream
+                continue
+            stack.append((node, True))
+            stack.extend((dependent, False) for dependent in dependents if dependent.job_id not in self._ranks)
+        return self._ranks[job.job_id]
+
+    def record_step(self, job: Job, seconds: float) -> None:
+        self._busy[job.job_id] = self._busy.get(job.job_id, 0.0) + seconds
+
+    def job_finished(self, job: Job, succeeded: bool = True) -> None:
+        self._dependents.pop(job.job_id, None)
+        self._ranks.pop(job.job_id, None)
+        busy = self._busy.pop(job.job_id, None)
+        if not succeeded or busy is None:
+            return
+
+        previous = self.durations.get(job.func_name)
+        estimate = busy if previous is None else previous + self.smoothing * (busy - previous)
+        self.durations[job.func_name] = estimate
+        # Re-rank only when an estimate moves a lot, so ranking stays cheap per completion
+        if previous is None or abs(estimate - previous) > 0.5 * previous:
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._ranks.clear()
+        self.version += 1
+
+    def save_history(self) -> None:
+        if not self.history_file:
+            return
+        with open(self.history_file, "w") as file:
+            json.dump(self.durations, file)
+        logger.info("Saved job duration history to %s", self.history_file)
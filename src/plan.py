@@ -0,0 +1,160 @@
+import os
+import json
+import heapq
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from src.executors import EXECUTORS
+from src.results import RESULTS_OF, create_channel, is_results_reference
+from src.retry import RetryPolicy
+from src.utils import func_resolver
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the compiled form changes, so older cached plans are compiled again
+PLAN_VERSION = 3
+
+# Integer job options and their defaults
+INT_FIELDS = {"start_at": 0, "max_tries": 1, "priority": 0}
+
+
+class PlanError(ValueError):
+    pass
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_plan(yaml_file: str, cache_file: Optional[str] = None) -> List[Dict[str, Any]]:
+    # Job configs of a YAML file, validated and dependencies first. The compiled plan is cached as JSON
+    # next to the file and reused for as long as the file's content hash is unchanged
+    cache_file = cache_file or yaml_file + ".plan.json"
+    digest = file_hash(yaml_file)
+    try:
+        with open(cache_file, "r") as file:
+            cached = json.load(file)
+        if cached.get("version") == PLAN_VERSION and cached.get("hash") == digest:
+            logger.debug("Using compiled plan %s for %s", cache_file, yaml_file)
+            return cached["jobs"]
+    except (OSError, ValueError):
+        pass
+
+    with open(yaml_file, "r") as file:
+        plan = compile_plan(yaml.safe_load(file))
+    try:
+        with open(cache_file + ".tmp", "w") as file:
+            json.dump({"version": PLAN_VERSION, "hash": digest, "jobs": plan}, file)
+        os.replace(cache_file + ".tmp", cache_file)
+    except OSError as e:
+        logger.warning("Could not cache compiled plan to %s: %s", cache_file, e)
+    logger.info("Compiled plan with %s jobs from %s", len(plan), yaml_file)
+    return plan
+
+
+def compile_plan(config: Any) -> List[Dict[str, Any]]:
+    if not isinstance(config, dict) or not isinstance(config.get("jobs"), list):
+        raise PlanError("Job file must have a 'jobs' list")
+
+    jobs: Dict[str, Dict[str, Any]] = {}
+    order: Dict[str, int] = {}
+    for index, job_conf in enumerate(config["jobs"]):
+        job = _compile_job(index, job_conf)
+        if job["id"] in jobs:
+            raise PlanError(f"Duplicate job id {job['id']}")
+        jobs[job["id"]] = job
+        order[job["id"]] = index
+
+    return _order_jobs(jobs, order)
+
+
+def _order_jobs(jobs: Dict[str, Dict[str, Any]], order: Dict[str, int]) -> List[Dict[str, Any]]:
+    dependents: Dict[str, List[str]] = {job_id: [] for job_id in jobs}
+    unmet: Dict[str, int] = {}
+    for job_id, job in jobs.items():
+        for dep_id in job["dependencies"]:
+            if dep_id not in jobs:
+                raise PlanError(f"Job {job_id} depends on unknown job {dep_id}")
+            dependents[dep_id].append(job_id)
+        unmet[job_id] = len(job["dependencies"])
+
+    # Kahn's algorithm; among jobs whose dependencies are done, file order decides
+    ready = [(order[job_id], job_id) for job_id, count in unmet.items() if count == 0]
+    heapq.heapify(ready)
+    plan = []
+    while ready:
+        _, job_id = heapq.heappop(ready)
+        plan.append(jobs[job_id])
+        for dependent in dependents[job_id]:
+            unmet[dependent] -= 1
+            if unmet[dependent] == 0:
+                heapq.heappush(ready, (order[dependent], dependent))
+    if len(plan) < len(jobs):
+        raise PlanError(f"Dependency cycle: {' -> '.join(_find_cycle(jobs, unmet))}")
+    return plan
+
+
+def _compile_job(index: int, job_conf: Any) -> Dict[str, Any]:
+    if not isinstance(job_conf, dict) or "id" not in job_conf or "function" not in job_conf:
+        raise PlanError(f"Job #{index + 1} needs an 'id' and a 'function'")
+    job_id = str(job_conf["id"])
+    if func_resolver(job_conf["function"]) is None:
+        raise PlanError(f"Job {job_id} uses unknown function {job_conf['function']}")
+    args = job_conf.get("args") or []
+    if not isinstance(args, list) or not isinstance(job_conf.get("dependencies") or [], list):
+        raise PlanError(f"Job {job_id}: 'args' and 'dependencies' must be lists")
+    dependencies = [str(dep_id) for dep_id in job_conf.get("dependencies") or []]
+    # Streaming another job's results implies depending on it
+    for arg in args:
+        if is_results_reference(arg) and str(arg[RESULTS_OF]) not in dependencies:
+            dependencies.append(str(arg[RESULTS_OF]))
+    options = _compile_options(job_id, job_conf)
+    return dict(job_conf, id=job_id, args=args, dependencies=list(dict.fromkeys(dependencies)), **options)
+
+
+def _compile_options(job_id: str, job_conf: Dict[str, Any]) -> Dict[str, Any]:
+    # Checked here, so a cached plan always builds its jobs
+    options = {field: _compile_int(job_id, field, job_conf.get(field, value)) for field, value in INT_FIELDS.items()}
+    if job_conf.get("executor") is not None and job_conf["executor"] not in EXECUTORS:
+        raise PlanError(f"Job {job_id} uses unknown executor {job_conf['executor']}")
+    for field, build in (("retry", RetryPolicy.from_record), ("results", create_channel)):
+        value = job_conf.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, dict):
+            raise PlanError(f"Job {job_id}: '{field}' must be a mapping, not {value!r}")
+        try:
+            build(value)
+        except KeyError as e:
+            raise PlanError(f"Job {job_id}: '{field}' is missing {e}") from None
+        except (TypeError, ValueError) as e:
+            raise PlanError(f"Job {job_id}: Invalid '{field}': {e}") from None
+    return options
+
+
+def _compile_int(job_id: str, field: str, value: Any) -> int:
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise PlanError(f"Job {job_id}: '{field}' must be an integer, not {value!r}")
+
+
+def _find_cycle(jobs: Dict[str, Dict[str, Any]], unmet: Dict[str, int]) -> List[str]:
+    # Every job left over has an unfinished dependency, so following them must come back around
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    job_id = next(job_id for job_id, count in unmet.items() if count)
+    while job_id not in seen:
+        seen[job_id] = len(path)
+        path.append(job_id)
+        job_id = next(dep_id for dep_id in jobs[job_id]["dependencies"] if unmet[dep_id])
+    return path[seen[job_id]:] + [job_id]
@@ -0,0 +1,102 @@
+import time
+import heapq
+import itertools
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.job import Job
+from src.ordering import CriticalPathPolicy
+
+
+class ReadyQueue:
+    # Runnable jobs grouped in named queues. Queues share dispatches in proportion to their weights
+    # (stride scheduling); inside a queue higher priority goes first and waiting jobs age upwards
+    # by one priority level per aging_interval seconds, so nothing starves. With an ordering policy a
+    # job ranks as if it had already waited as long as the critical path it unblocks.
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        aging_interval: float = 10.0,
+        wait_samples: int = 1024,
+        ordering: Optional[CriticalPathPolicy] = None,
+    ) -> None:
+        self.weights: Dict[str, float] = dict(weights or {})
+        self.aging_interval = aging_interval
+        self.wait_samples = wait_samples
+        self.ordering = ordering
+        self._ordering_version = ordering.version if ordering is not None else 0
+        self._queues: Dict[str, List[Tuple[float, int, float, Job]]] = {}
+        self._passes: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._size = 0
+        self._waits: Dict[str, Deque[float]] = {}
+        # Queue wait of the job returned by the latest popleft()
+        self.last_wait = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Job]:
+        for entries in self._queues.values():
+            for entry in sorted(entries):
+                yield entry[3]
+
+    def append(self, job: Job) -> None:
+        now = time.time()
+        key = self._key(job, now)
+        entries = self._queues.get(job.queue)
+        if entries is None:
+            entries = self._queues[job.queue] = []
+            # A queue returning from idle does not get credit for the time it was empty
+            self._passes[job.queue] = max(self._passes.get(job.queue, 0.0), self._virtual_time)
+        heapq.heappush(entries, (key, next(self._sequence), now, job))
+        self._size += 1
+
+    def _key(self, job: Job, enqueued_at: float) -> float:
+        head_start = self.ordering.rank(job) if self.ordering is not None else 0.0
+        # Static heap key equivalent to ordering by priority + waited / aging_interval
+        return (enqueued_at - head_start) / self.aging_interval - job.priority
+
+    def _rerank(self) -> None:
+        for entries in self._queues.values():
+            entries[:] = [(self._key(job, enqueued_at), seq, enqueued_at, job) for _, seq, enqueued_at, job in entries]
+            heapq.heapify(entries)
+        self._ordering_version = self.ordering.version
+
+    def popleft(self) -> Job:
+        if not self._size:
+            raise IndexError("pop from an empty ReadyQueue")
+        if self.ordering is not None and self.ordering.version != self._ordering_version:
+            self._rerank()
+        name = min(self._queues, key=self._passes.__getitem__)
+        entries = self._queues[name]
+        _, _, enqueued_at, job = heapq.heappop(entries)
+        if not entries:
+            del self._queues[name]
+        self._size -= 1
+
+        self._virtual_time = self._passes[name]
+        self._passes[name] += 1.0 / self.weights.get(name, 1.0)
+
+        waits = self._waits.get(name)
+        if waits is None:
+            waits = self._waits[name] = deque(maxlen=self.wait_samples)
+        self.last_wait = time.time() - enqueued_at
+        waits.append(self.last_wait)
+        return job
+
+    def clear(self) -> None:
+        self._queues.clear()
+        self._size = 0
+
+    def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for name, waits in self._waits.items():
+            samples = sorted(waits)
+            stats[name] = {
+                "samples": len(samples),
+                "p50": samples[int(0.50 * (len(samples) - 1))],
+                "p99": samples[int(0.99 * (len(samples) - 1))],
+            }
+        return stats
@@ -0,0 +1,113 @@
+import json
+from collections import deque
+from typing import Any, Deque, Dict, IO, Iterator, Optional
+
+# Job argument placeholder that is replaced by a stream over a dependency's results
+RESULTS_OF = "results_of"
+
+
+def results_of(job_id: str) -> Dict[str, str]:
+    return {RESULTS_OF: job_id}
+
+
+def is_results_reference(value: Any) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and RESULTS_OF in value
+
+
+class ResultsDroppedError(RuntimeError):
+    pass
+
+
+class ResultChannel:
+    # Values yielded by a job, in order. Consumers read them once the producing job has finished.
+    def put(self, value: Any) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stream(self) -> Iterator[Any]:
+        raise NotImplementedError
+
+    def to_record(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class RingBufferChannel(ResultChannel):
+    # Keeps the last `capacity` values; older ones are dropped and counted, and a consumer
+    # reading a channel that dropped values fails instead of getting partial results. Values
+    # live in this process only: a channel of a finished job that was loaded from a record, or
+    # opened after the job finished, is lost and fails its consumers the same way
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.dropped = 0
+        self.lost = False
+        self._values: Deque[Any] = deque(maxlen=capacity)
+
+    def put(self, value: Any) -> None:
+        if len(self._values) == self.capacity:
+            self.dropped += 1
+        self._values.append(value)
+
+    def clear(self) -> None:
+        self._values.clear()
+        self.dropped = 0
+        self.lost = False
+
+    def stream(self) -> Iterator[Any]:
+        if self.lost:
+            raise ResultsDroppedError("Results of the finished job were not kept in memory, use a FileChannel")
+        if self.dropped:
+            raise ResultsDroppedError(
+                f"{self.dropped} results were dropped from a ring buffer of {self.capacity}, use a FileChannel"
+            )
+        return iter(self._values)
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"type": "memory", "capacity": self.capacity}
+
+
+class FileChannel(ResultChannel):
+    # Appends values as JSON lines, so output of any size is kept without holding it in memory
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def put(self, value: Any) -> None:
+        if self._file is None:
+            self._file = open(self.path, "w")
+        self._file.write(json.dumps(value, default=str) + "\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self) -> None:
+        self.close()
+        open(self.path, "w").close()
+
+    def stream(self) -> Iterator[Any]:
+        if self._file is not None:
+            self._file.flush()
+        try:
+            file = open(self.path, "r")
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                yield json.loads(line)
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"type": "file", "path": self.path}
+
+
+def create_channel(data: Optional[Dict[str, Any]]) -> Optional[ResultChannel]:
+    if data is None:
+        return None
+    if data.get("type", "file" if "path" in data else "memory") == "file":
+        return FileChannel(data["path"])
+    return RingBufferChannel(data.get("capacity", 1024))
@@ -0,0 +1,69 @@
+import random
+import builtins
+import importlib
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+
+
+def _exception_name(exception_type: Type[BaseException]) -> str:
+    if exception_type.__module__ == "builtins":
+        return exception_type.__qualname__
+    return f"{exception_type.__module__}.{exception_type.__qualname__}"
+
+
+def _resolve_exception(name: str) -> Type[BaseException]:
+    try:
+        if "." not in name:
+            resolved = getattr(builtins, name)
+        else:
+            module_name, attr = name.rsplit(".", 1)
+            resolved = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Unknown exception {name} in retry_on") from e
+    # Anything else would make isinstance() raise inside the scheduler loop on the first failure
+    if not (isinstance(resolved, type) and issubclass(resolved, BaseException)):
+        raise ValueError(f"{name} in retry_on is not an exception class")
+    return resolved
+
+
+class RetryPolicy:
+    # Delay before retry n is base_delay * factor ** (n - 1), capped at max_delay. With jitter j the
+    # delay is drawn from [delay * (1 - j), delay] so jobs failing together do not retry together.
+    def __init__(
+        self,
+        base_delay: float = 1.0,
+        factor: float = 2.0,
+        max_delay: float = 60.0,
+        jitter: float = 0.5,
+        retry_on: Sequence[Type[BaseException]] = (Exception,),
+    ) -> None:
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on: Tuple[Type[BaseException], ...] = tuple(retry_on)
+
+    def should_retry(self, error: BaseException) -> bool:
+        return isinstance(error, self.retry_on)
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * self.factor ** max(attempt - 1, 0), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "base_delay": self.base_delay,
+            "factor": self.factor,
+            "max_delay": self.max_delay,
+            "jitter": self.jitter,
+            "retry_on": [_exception_name(exception_type) for exception_type in self.retry_on],
+        }
+
+    @staticmethod
+    def from_record(data: Optional[Dict[str, Any]]) -> Optional["RetryPolicy"]:
+        # Also reads the retry section of a YAML job config, where every key is optional
+        if data is None:
+            return None
+        data = dict(data)
+        if "retry_on" in data:
+            data["retry_on"] = [_resolve_exception(name) for name in data["retry_on"]]
+        return RetryPolicy(**data)
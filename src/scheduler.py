@@ -1,92 +1,740 @@
 import os
 import json
+import time
+import heapq
+import asyncio
+import itertools
+import threading
 
 from collections import deque
-from typing import Deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
-import logging.config
+import logging
 
-from config.logger import LOGGING
+from src.admission import AdmissionPolicy, JobHandle, SchedulerFullError
+from src.executors import JobExecutor, check_executor, create_executor
 from src.job import Job, JobStatus, JobRegistry
+from src.journal import JobJournal, JournalEvent
+from src.job_store import JobStore
+from src import tracing
+from src.metrics import SchedulerMetrics
+from src.ordering import CriticalPathPolicy
+from src.queues import ReadyQueue
+from src.retry import RetryPolicy
+from src.slicing import SlicePolicy
+from src.serialization import deserialize_graph, load_graph, serialize_graph
 from src.utils import func_resolver
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
 
 class Scheduler:
-    def __init__(self, pool_size: int = 10, state_file: str = "scheduler_state.json") -> None:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        state_file: str = "scheduler_state.json",
+        executor: Union[str, JobExecutor] = "serial",
+        journal: Optional[JobJournal] = None,
+        queue_weights: Optional[Dict[str, float]] = None,
+        aging_interval: float = 10.0,
+        ordering: Optional[CriticalPathPolicy] = None,
+        max_pending: Optional[int] = None,
+        admission: Union[str, AdmissionPolicy] = AdmissionPolicy.BLOCK,
+        spill_file: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        slicing: Optional[SlicePolicy] = None,
+        metrics: Optional[SchedulerMetrics] = None,
+        trace: Optional[tracing.TraceRecorder] = None,
+        store: Optional[JobStore] = None,
+    ) -> None:
         self._pool_size: int = pool_size
-        self.job_queue: Deque[Job] = deque()
+        self._executor: JobExecutor = (
+            executor if isinstance(executor, JobExecutor) else create_executor(executor, pool_size)
+        )
+        # Executors requested per job by name, created on first use
+        self._executors: Dict[str, JobExecutor] = {}
+        # Jobs with a step currently submitted to an executor
+        self._in_flight: Dict[Future, Job] = {}
+        self._dispatched_at: Dict[Future, float] = {}
+        self._ordering = ordering
+        self._slicing = slicing if slicing is not None else SlicePolicy()
+        self.job_queue: ReadyQueue = ReadyQueue(queue_weights, aging_interval, ordering=ordering)
+        # Jobs whose start_at is in the future, ordered by start_at
+        self._delayed_jobs: List[Tuple[float, int, Job]] = []
+        self._sequence = itertools.count()
+        # Deadlines of started jobs with a max_working_time, ordered by deadline
+        self._deadlines: List[Tuple[float, int, Job]] = []
+        # Reverse dependency edges and remaining in-degree of blocked jobs
+        self._dependents: Dict[str, List[Job]] = {}
+        self._blocked_jobs: Dict[str, Job] = {}
+        self._unmet_dependencies: Dict[str, int] = {}
         self.state_file = state_file
+        self._journal = journal
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
         self.running = False
+        # Admission: submitted jobs not yet finished are bounded by max_pending. Producer threads hand
+        # jobs to the loop through the inbox; the wakeup future interrupts the loop's waits
+        self.max_pending = max_pending
+        self.admission = AdmissionPolicy(admission)
+        self.spill_file = spill_file or state_file + ".spill"
+        self._condition = threading.Condition()
+        self._inbox: Deque[Job] = deque()
+        # Callbacks other threads hand to the loop, run between dispatches
+        self._calls: Deque[Callable[[], None]] = deque()
+        self._handles: Dict[str, JobHandle] = {}
+        self._admitted = 0
+        self._spilled = 0
+        self._spill_offset = 0
+        self._unspilling = False
+        self._wakeup: Future = Future()
+        self._loop_thread: Optional[int] = None
+        self._stop_requested = False
+        # Instrumentation is skipped entirely without a metrics object
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.watch(
+                ready=lambda: len(self.job_queue),
+                delayed=lambda: len(self._delayed_jobs),
+                blocked=lambda: len(self._blocked_jobs),
+                running=lambda: len(self._in_flight),
+            )
 
-    def schedule(self, job: Job) -> None:
-        logger.info("Job scheduling ...")
-        if len(self.job_queue) < self._pool_size:
-            self.job_queue.append(job)
-            logger.info("Job has been added successfully ...")
+        self.trace = trace
+        # With a shared store, added jobs go to the store and the loop runs the ones it claims from it
+        self._store = store
+        self._next_claim_at = 0.0
+        self._next_poll_at = 0.0
+
+    def schedule(self, job: Job) -> JobHandle:
+        logger.debug("Job scheduling ...")
+        return self.submit(job)
+
+    def submit(self, job: Job, timeout: Optional[float] = None) -> JobHandle:
+        # Checked here, as the loop would only find out when dispatching the job
+        check_executor(job.executor)
+        handle = JobHandle(job)
+        with self._condition:
+            if self.admission == AdmissionPolicy.SPILL and (self._spilled or not self._has_capacity()):
+                self._spill(handle, job)
+                return handle
+            if not self._has_capacity():
+                self._wait_for_capacity(timeout)
+            self._admit(handle, job)
+        return handle
+
+    async def submit_async(self, job: Job, timeout: Optional[float] = None) -> JobHandle:
+        # Waits for capacity off the event loop so the producer coroutine yields instead of blocking it
+        if self.admission != AdmissionPolicy.BLOCK:
+            return self.submit(job, timeout)
+        return await asyncio.get_running_loop().run_in_executor(None, self.submit, job, timeout)
+
+    def _has_capacity(self) -> bool:
+        return self.max_pending is None or self._admitted < self.max_pending
+
+    def _wait_for_capacity(self, timeout: Optional[float]) -> None:
+        if self.admission == AdmissionPolicy.REJECT:
+            raise SchedulerFullError(f"Scheduler has {self._admitted} pending jobs, limit is {self.max_pending}")
+        if not self.running:
+            # Capacity is only freed by a running loop
+            raise SchedulerFullError(f"Scheduler has {self._admitted} pending jobs and is not running")
+        if threading.get_ident() == self._loop_thread:
+            # Only the loop frees capacity, so it must never wait on itself
+            raise SchedulerFullError("Cannot block for capacity from the scheduler loop")
+        if not self._condition.wait_for(self._has_capacity, timeout):
+            raise SchedulerFullError(f"No capacity for job after waiting {timeout} seconds")
+
+    def _admit(self, handle: JobHandle, job: Job) -> None:
+        self._admitted += 1
+        self._handles[job.job_id] = handle
+        if self.running:
+            self._inbox.append(job)
+            self._wake()
         else:
-            logger.info("Scheduler task list exceeds the limit %s", self._pool_size)
+            self.add_job(job)
+            logger.debug("Job has been added successfully ...")
+
+    def _spill(self, handle: JobHandle, job: Job) -> None:
+        # A spilled job is rebuilt from its record, which only names its function
+        if func_resolver(job.func_name) is not job.func:
+            raise SchedulerFullError(
+                f"Scheduler is full and job {job.job_id} cannot be spilled: "
+                f"{job.func_name} is not resolved by func_resolver"
+            )
+        # The spill file starts over whenever every spilled job has been admitted back
+        with open(self.spill_file, "a" if self._spilled else "w") as file:
+            file.write(job.serialize() + "\n")
+        handle._spill()
+        self._handles[job.job_id] = handle
+        self._spilled += 1
+        logger.info("Scheduler is full, spilled job %s to %s", job.job_id, self.spill_file)
+
+    def _unspill(self) -> None:
+        # Spilled jobs are admitted back in submission order as capacity frees up
+        if self._unspilling:
+            return
+        self._unspilling = True
+        try:
+            while self._spilled and self._has_capacity():
+                with open(self.spill_file, "r") as file:
+                    file.seek(self._spill_offset)
+                    line = file.readline()
+                    self._spill_offset = file.tell()
+                self._spilled -= 1
+                job = self._load_spilled(line)
+                handle = self._handles[job.job_id]
+                handle._restore(job)
+                self._admit(handle, job)
+        finally:
+            self._unspilling = False
+        if not self._spilled:
+            self._spill_offset = 0
+
+    def _load_spilled(self, line: str) -> Job:
+        data = json.loads(line)
+        # A spilled job that dependents still reference comes back as that same object
+        job = self._handles[data["job_id"]]._live_job()
+        if job is not None:
+            return job
+        return Job.create_from_data(data, func_resolver, JobRegistry(), link_dependencies=False)
+
+    def _spilled_jobs(self) -> Iterator[Job]:
+        if not self._spilled:
+            return
+        with open(self.spill_file, "r") as file:
+            file.seek(self._spill_offset)
+            for line in file:
+                job = self._load_spilled(line)
+                job.dependencies = self._handles[job.job_id]._spilled_dependencies or ()
+                yield job
+
+    def _release(self, job: Job) -> None:
+        handle = self._handles.pop(job.job_id, None)
+        if handle is None:
+            return
+        handle._resolve()
+        with self._condition:
+            self._admitted -= 1
+            if self._spilled:
+                self._unspill()
+            self._condition.notify_all()
+
+    def _wake(self) -> None:
+        if not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def _drain_inbox(self) -> None:
+        with self._condition:
+            while self._inbox:
+                self.add_job(self._inbox.popleft())
+            calls = list(self._calls)
+            self._calls.clear()
+            if self._wakeup.done():
+                self._wakeup = Future()
+        for call in calls:
+            # A failing callback must not take the loop and its running jobs down with it
+            try:
+                call()
+            except Exception:
+                logger.exception("Callback %r run in the scheduler loop failed", call)
+
+    def run_in_loop(self, callback: Callable[[], None]) -> None:
+        # Runs callback on the loop thread, or right away when the loop is not running
+        with self._condition:
+            if self.running:
+                self._calls.append(callback)
+                self._wake()
+                return
+        callback()
+
+    def cancel(self, job_id: str) -> bool:
+        # Drops an unfinished job without failing its dependents, which stay blocked; must run on the loop
+        # thread (see run_in_loop). Cancelled jobs end up FAILED with the error "Cancelled"
+        job = self._take_unfinished(job_id)
+        if job is None:
+            return False
+
+        job.update_status(JobStatus.FAILED, error="Cancelled")
+        self._record(JournalEvent.FAILED, job)
+        if self._ordering is not None:
+            self._ordering.job_finished(job, succeeded=False)
+        if self.metrics is not None:
+            self.metrics.job_finished(job)
+        if self.trace is not None:
+            self.trace.finished(job, "cancelled")
+        job.close_coroutine()
+        logger.info("Job %s: Cancelled", job.job_id)
+        self._release(job)
+        return True
+
+    def _take_unfinished(self, job_id: str) -> Optional[Job]:
+        # Stops tracking the job wherever it is running or waiting
+        future, job = next(((f, j) for f, j in self._in_flight.items() if j.job_id == job_id), (None, None))
+        if future is not None:
+            del self._in_flight[future]
+            del self._dispatched_at[future]
+            self._executor_for(job).cancel(future)
+            return job
+        if job_id in self._blocked_jobs:
+            del self._unmet_dependencies[job_id]
+            return self._blocked_jobs.pop(job_id)
+        job = next((j for _, _, j in self._delayed_jobs if j.job_id == job_id), None)
+        if job is not None:
+            self._delayed_jobs = [entry for entry in self._delayed_jobs if entry[2] is not job]
+            heapq.heapify(self._delayed_jobs)
+            return job
+        # Ready jobs are skipped when popped
+        return next((j for j in self.job_queue if j.job_id == job_id and j.status != JobStatus.FAILED), None)
+
+    def request_stop(self) -> None:
+        # Lets run(wait_for_jobs=True) return once the work it already has is finished
+        with self._condition:
+            self._stop_requested = True
+            self._wake()
 
     def add_job(self, job: Job) -> None:
-        logger.info("Adding new job %s", job.job_id)
+        logger.debug("Adding new job %s", job.job_id)
+        check_executor(job.executor)
+        if self._store is not None:
+            self._store.add(job)
+        if self.metrics is not None:
+            self.metrics.job_enqueued(job)
+        if self._store is not None:
+            return
+        self._record(JournalEvent.ENQUEUED, job)
+        if self._ordering is not None:
+            self._ordering.add(job)
+        self._enqueue(job)
+
+    def _record(self, event: JournalEvent, job: Job) -> None:
+        if self._journal is not None:
+            self._journal.record(event, job)
+
+    def _enqueue(self, job: Job) -> None:
+        if not job.are_dependencies_completed() and self._block_on_dependencies(job):
+            return
+        self._enqueue_ready(job)
+
+    def _enqueue_ready(self, job: Job) -> None:
+        if job.is_start_time_reached():
+            self._append_ready(job)
+        else:
+            if self.trace is not None:
+                self.trace.state(job, "delayed")
+            heapq.heappush(self._delayed_jobs, (job.start_at, next(self._sequence), job))
+
+    def _append_ready(self, job: Job) -> None:
+        if self.trace is not None:
+            self.trace.state(job, "ready")
         self.job_queue.append(job)
 
-    def run(self) -> None:
-        while self.job_queue:
+    def _block_on_dependencies(self, job: Job) -> bool:
+        unmet = 0
+        for dependency in job.dependencies:
+            if dependency.status == JobStatus.FAILED:
+                logger.error("Cannot run job %s: Dependency failed", job.job_id)
+                self._fail_job(job, "Dependency failed")
+                return True
+            if dependency.status != JobStatus.COMPLETED:
+                self._dependents.setdefault(dependency.job_id, []).append(job)
+                unmet += 1
+        if unmet:
+            if self.trace is not None:
+                self.trace.state(job, "blocked")
+            self._blocked_jobs[job.job_id] = job
+            self._unmet_dependencies[job.job_id] = unmet
+        return unmet > 0
+
+    def _complete_job(self, job: Job, result: Optional[Any] = None) -> None:
+        job.update_status(JobStatus.COMPLETED, result=result)
+        self._record(JournalEvent.COMPLETED, job)
+        if self._store is not None:
+            self._store.complete(job)
+        if self._ordering is not None:
+            self._ordering.job_finished(job)
+        if self.metrics is not None:
+            self.metrics.job_finished(job)
+        if self.trace is not None:
+            self.trace.finished(job, "completed")
+        logger.info("Job %s: Completed", job.job_id)
+        self._release(job)
+        for dependent in self._dependents.pop(job.job_id, []):
+            # Entries of cancelled jobs are stale, even when a new job has taken over the ID
+            if self._blocked_jobs.get(dependent.job_id) is not dependent:
+                continue
+            remaining = self._unmet_dependencies[dependent.job_id]
+            if remaining > 1:
+                self._unmet_dependencies[dependent.job_id] = remaining - 1
+                continue
+            del self._unmet_dependencies[dependent.job_id]
+            del self._blocked_jobs[dependent.job_id]
+            self._enqueue_ready(dependent)
+
+    def _fail_job(self, job: Job, error: str) -> None:
+        job.update_status(JobStatus.FAILED, error=error)
+        self._record(JournalEvent.FAILED, job)
+        if self._store is not None:
+            self._store.fail(job, error)
+        if self._ordering is not None:
+            self._ordering.job_finished(job, succeeded=False)
+        if self.metrics is not None:
+            self.metrics.job_finished(job)
+        if self.trace is not None:
+            self.trace.finished(job, "failed", error=error)
+        job.close_coroutine()
+        self._release(job)
+        failed = [job]
+        while failed:
+            for dependent in self._dependents.pop(failed.pop().job_id, []):
+                if self._blocked_jobs.get(dependent.job_id) is not dependent:
+                    continue
+                del self._blocked_jobs[dependent.job_id]
+                del self._unmet_dependencies[dependent.job_id]
+                logger.error("Cannot run job %s: Dependency failed", dependent.job_id)
+                dependent.update_status(JobStatus.FAILED, error="Dependency failed")
+                self._record(JournalEvent.FAILED, dependent)
+                if self.metrics is not None:
+                    self.metrics.job_finished(dependent)
+                if self.trace is not None:
+                    self.trace.finished(dependent, "failed", error="Dependency failed")
+                self._release(dependent)
+                failed.append(dependent)
+
+    def _release_due_jobs(self) -> None:
+        now = time.time()
+        while self._delayed_jobs and self._delayed_jobs[0][0] <= now:
+            _, _, job = heapq.heappop(self._delayed_jobs)
+            self._append_ready(job)
+
+    def _time_until_next_due_job(self) -> Optional[float]:
+        if not self._delayed_jobs:
+            return None
+        return max(self._delayed_jobs[0][0] - time.time(), 0)
+
+    def _time_until_next_event(self) -> Optional[float]:
+        due = self._time_until_next_due_job()
+        if self._store is not None:
+            due = self._store.poll_interval if due is None else min(due, self._store.poll_interval)
+        if not self._deadlines:
+            return due
+        deadline = max(self._deadlines[0][0] - time.time(), 0)
+        return deadline if due is None else min(due, deadline)
+
+    def _expire_deadlines(self) -> None:
+        now = time.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, _, job = heapq.heappop(self._deadlines)
+            # Entries of finished or restarted tries are stale
+            if job.status in (JobStatus.COMPLETED, JobStatus.FAILED) or job.deadline() != deadline:
+                continue
+            logger.error("Job %s: Max working time exceeded", job.job_id)
+            future = next((future for future, running in self._in_flight.items() if running is job), None)
+            if future is not None:
+                del self._in_flight[future]
+                del self._dispatched_at[future]
+                self._executor_for(job).cancel(future)
+            self._fail_job(job, "Max working time exceeded")
+
+    def _wait_for_next_due_job(self) -> None:
+        delay = self._time_until_next_due_job()
+        if delay:
+            logger.info("No runnable jobs, sleeping %.3f seconds until the next start time", delay)
+            time.sleep(delay)
+
+    def queue_wait_stats(self) -> Dict[str, Dict[str, float]]:
+        return self.job_queue.wait_stats()
+
+    def pending_jobs(self) -> Iterator[Job]:
+        yield from self._in_flight.values()
+        yield from self.job_queue
+        yield from (job for _, _, job in sorted(self._delayed_jobs))
+        yield from self._blocked_jobs.values()
+        yield from self._spilled_jobs()
+
+    def _clear(self) -> None:
+        self.job_queue.clear()
+        self._delayed_jobs.clear()
+        self._deadlines.clear()
+        self._dependents.clear()
+        self._blocked_jobs.clear()
+        self._unmet_dependencies.clear()
+        with self._condition:
+            self._inbox.clear()
+            self._calls.clear()
+            self._handles.clear()
+            self._admitted = self._spilled = self._spill_offset = 0
+            self._condition.notify_all()
+
+    def run(self, wait_for_jobs: bool = False) -> None:
+        # With wait_for_jobs the loop idles for new submissions until request_stop() is called
+        self._start_loop()
+        try:
+            while True:
+                self._drain_inbox()
+                if self._store is not None:
+                    self._sync_store()
+                if not (self.job_queue or self._delayed_jobs or self._in_flight):
+                    if not self._keep_waiting(wait_for_jobs):
+                        break
+                    wait([self._wakeup], timeout=self._store.poll_interval if self._store is not None else None)
+                    continue
+                self._release_due_jobs()
+                self._dispatch_ready_jobs()
+                self._checkpoint(idle=not any(future.done() for future in self._in_flight))
+                if self.metrics is not None:
+                    self.metrics.tick()
+                if self._in_flight:
+                    self._wait_for_steps()
+                elif wait_for_jobs and not self.job_queue:
+                    wait([self._wakeup], timeout=self._time_until_next_due_job())
+                elif not self.job_queue:
+                    self._wait_for_next_due_job()
+        finally:
+            self._stop_loop()
+        self._warn_blocked()
+
+    def _start_loop(self) -> None:
+        with self._condition:
+            self.running = True
+            self._loop_thread = threading.get_ident()
+            self._stop_requested = False
+        if self.trace is not None:
+            tracing.active_tracer = self.trace
+
+    def _keep_waiting(self, wait_for_jobs: bool) -> bool:
+        # Called with nothing left to run. Other workers may still hand jobs back, fail, or unblock dependents
+        waiting = wait_for_jobs or (self._store is not None and self._store.has_unfinished())
+        if not waiting or self._stop_requested:
+            return False
+        self._checkpoint(idle=True)
+        return True
+
+    def _wait_for_steps(self) -> None:
+        timeout = self._time_until_next_event()
+        done, _ = wait([*self._in_flight, self._wakeup], timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future is not self._wakeup:
+                self._finish_step(future)
+        self._expire_deadlines()
+
+    def _stop_loop(self) -> None:
+        with self._condition:
+            self.running = False
+            # Late submissions stay queued for the next run
+            while self._inbox:
+                self.add_job(self._inbox.popleft())
+        if self._store is not None:
+            self._resolve_finished_handles()
+        if self._journal is not None:
+            self._journal.sync()
+        if self.metrics is not None:
+            self.metrics.tick(force=True)
+        if self.trace is not None:
+            tracing.active_tracer = None
+            self.trace.write()
+
+    def _warn_blocked(self) -> None:
+        if self._blocked_jobs:
+            logger.warning("Jobs %s are blocked on dependencies outside of the scheduler", list(self._blocked_jobs))
+
+    def _sync_store(self) -> None:
+        now = time.time()
+        if now >= self._next_poll_at:
+            self._next_poll_at = now + self._store.poll_interval
+            held = [job.job_id for job in itertools.chain(self._in_flight.values(), self.job_queue)]
+            # Leases are renewed every poll, far more often than they run out
+            if held and self._store.renew(held) < len(held):
+                logger.warning("Worker %s lost the lease of some of its jobs", self._store.worker_id)
+            self._resolve_finished_handles()
+        # Claims are batched: up to pool_size jobs wait locally so a claim is not needed for every dispatch
+        held = len(self._in_flight) + len(self.job_queue)
+        if held > self._pool_size or now < self._next_claim_at:
+            return
+        claimed = self._claim_from_store(2 * self._pool_size - held)
+        if not claimed:
+            self._next_claim_at = now + self._store.poll_interval
+
+    def _claim_from_store(self, limit: int) -> int:
+        records = self._store.claim(limit)
+        if not records:
+            return 0
+        job_registry = JobRegistry()
+        # Dependencies of claimed jobs have completed; they are loaded for their result channels only
+        dependency_ids = {dep_id for record in records for dep_id in record.get("dependency_ids", [])}
+        load_graph(
+            [dict(record, dependency_ids=[]) for record in self._store.records(dependency_ids)],
+            func_resolver,
+            job_registry,
+        )
+        for job in load_graph(records, func_resolver, job_registry):
+            job.status = JobStatus.PENDING
+            handle = self._handles.get(job.job_id)
+            if handle is not None:
+                handle._attach(job)
+            if self._ordering is not None:
+                self._ordering.add(job)
+            self._append_ready(job)
+        return len(records)
+
+    def _resolve_finished_handles(self) -> None:
+        # Handles of jobs submitted here but finished by another worker
+        with self._condition:
+            job_ids = [job_id for job_id, handle in self._handles.items() if not handle.spilled]
+        for job_id, (status, error) in self._store.finished(job_ids).items():
+            job = self._handles[job_id].job
+            job.update_status(status, error=error)
+            self._release(job)
+
+    def _dispatch_ready_jobs(self) -> None:
+        while self.job_queue and len(self._in_flight) < self._pool_size:
             job = self.job_queue.popleft()
+            if job.status == JobStatus.FAILED:
+                # Timed out while waiting for its next step
+                continue
+            if self.metrics is not None:
+                self.metrics.job_dispatched(job, self.job_queue.last_wait)
 
             if job.has_exceeded_max_time():
-                job.update_status(JobStatus.FAILED, error="Max working time exceeded")
                 logger.error("Job %s: Max working time exceeded", job.job_id)
-                job.close_coroutine()
+                self._fail_job(job, "Max working time exceeded")
                 continue
 
-            if job.has_failed_dependency():
-                logger.error("Cannot run job %s: Dependency failed", job.job_id)
-                job.update_status(JobStatus.FAILED, error="Dependency failed")
-                job.close_coroutine()
+            try:
+                executor = self._executor_for(job)
+            except ValueError as e:
+                # Jobs loaded from a state file or the store were not checked on the way in
+                logger.error("Job %s: %s", job.job_id, e)
+                self._fail_job(job, str(e))
                 continue
+            self._submit_step(executor, job)
 
-            try:
-                job.run()
-            except StopIteration:
-                job.update_status(JobStatus.COMPLETED)
-                logger.info("Job %s: Completed", job.job_id)
-            except Exception as e:
-                logger.error("Error running job %s: %s", job.job_id, str(e))
-                job.close_coroutine()
-                if job.can_retry():
-                    job.restart_coroutine()  # Restart the coroutine
-                    job.current_tries += 1
-                    self.add_job(job)  # Re-add the job to the queue for a retry
-                else:
-                    logger.error("Job %s: Max retry exceeded", job.job_id)
-                    job.update_status(JobStatus.FAILED, error=str(e))
-            else:
-                if job.status != JobStatus.FAILED and job.status != JobStatus.COMPLETED:
-                    self.add_job(job)
+    def _submit_step(self, executor: JobExecutor, job: Job) -> None:
+        if job.start_time is None:
+            job.mark_started()
+            deadline = job.deadline()
+            if deadline is not None:
+                heapq.heappush(self._deadlines, (deadline, next(self._sequence), job))
+        if job.status == JobStatus.PENDING:
+            self._record(JournalEvent.RUNNING, job)
+        if self.trace is not None:
+            self.trace.state(job, "running")
+        max_steps, time_slice = self._slicing.budget(job)
+        future = executor.submit(job, max_steps, time_slice)
+        self._in_flight[future] = job
+        self._dispatched_at[future] = time.perf_counter()
+
+    def _finish_step(self, future: Future) -> None:
+        job = self._in_flight.pop(future)
+        elapsed = time.perf_counter() - self._dispatched_at.pop(future)
+        if self._ordering is not None:
+            self._ordering.record_step(job, elapsed)
+        steps = (future.result() or 0) if future.exception() is None else 0
+        self._slicing.record(job, steps, elapsed)
+        if self.metrics is not None:
+            self.metrics.step_finished(job, steps, elapsed)
+        self._handle_step_result(job, future)
+
+    def _executor_for(self, job: Job) -> JobExecutor:
+        if job.executor is None:
+            return self._executor
+        executor = self._executors.get(job.executor)
+        if executor is None:
+            executor = self._executors[job.executor] = create_executor(job.executor, self._pool_size)
+        return executor
+
+    def _handle_step_result(self, job: Job, future: Future) -> None:
+        try:
+            future.result()
+        except StopIteration as stop:
+            self._complete_job(job, stop.value)
+        except Exception as e:
+            self._retry_or_fail(job, e)
+        else:
+            if job.status != JobStatus.FAILED and job.status != JobStatus.COMPLETED:
+                self._append_ready(job)
+
+    def _retry_or_fail(self, job: Job, error: Exception) -> None:
+        logger.error("Error running job %s: %s", job.job_id, str(error))
+        job.close_coroutine()
+        policy = job.retry_policy or self.retry_policy
+        if not job.can_retry():
+            logger.error("Job %s: Max retry exceeded", job.job_id)
+            self._fail_job(job, str(error))
+            return
+        if not policy.should_retry(error):
+            logger.error("Job %s: %s is not retried", job.job_id, type(error).__name__)
+            self._fail_job(job, str(error))
+            return
+
+        job.restart_coroutine()
+        job.current_tries += 1
+        # Back off through the delayed heap instead of going straight back to the ready queue
+        delay = policy.delay(job.current_tries)
+        job.start_at = time.time() + delay
+        job.status = JobStatus.PENDING
+        self._record(JournalEvent.RETRY, job)
+        if self.metrics is not None:
+            self.metrics.job_retried(job)
+        if self.trace is not None:
+            self.trace.finished(job, "retry", error=str(error), tries=job.current_tries)
+        logger.info("Job %s: Retry %s of %s in %.3f seconds", job.job_id, job.current_tries, job.max_tries, delay)
+        if self._store is not None:
+            # Any worker may pick up the next try once it is due
+            self._store.retry(job)
+            return
+        self._enqueue(job)
+
+    def _checkpoint(self, idle: bool) -> None:
+        # Buffered transitions are committed as a group; force the commit only when the loop is about to block
+        if self._journal is None:
+            return
+        if self._journal.needs_compaction():
+            self._journal.compact(self.pending_jobs())
+        elif idle:
+            self._journal.sync()
 
     def load_jobs(self) -> None:
+        if self._store is not None:
+            # The store is the durable state; leases of jobs held by a crashed run simply run out
+            return
         job_registry = JobRegistry()
-        if os.path.exists(self.state_file):
+        if self._journal is not None:
+            jobs = load_graph(self._journal.replay(), func_resolver, job_registry)
+        elif os.path.exists(self.state_file):
             with open(self.state_file, "r") as file:
-                serialized_jobs = json.load(file)
-                for sj in serialized_jobs:
-                    self.add_job(Job.deserialize(sj, func_resolver, job_registry))
+                jobs = deserialize_graph(file.read(), func_resolver, job_registry)
+        else:
+            return
+
+        for job in jobs:
+            if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                continue
+            job.status = JobStatus.PENDING
+            self._enqueue(job)
+        if self._journal is not None:
+            self._journal.compact(self.pending_jobs())
 
     def save_jobs(self) -> None:
+        if self._store is not None:
+            self._store.release(job.job_id for job in self.pending_jobs())
+            return
+        if self._journal is not None:
+            self._journal.compact(self.pending_jobs())
+            return
         with open(self.state_file, "w") as file:
-            serialized_jobs = [job.serialize() for job in self.job_queue]
-            json.dump(serialized_jobs, file)
+            file.write(serialize_graph(self.pending_jobs()))
 
     def restart(self) -> None:
         self.stop()
-        self.job_queue.clear()
+        self._clear()
         self.load_jobs()
         self.run()
 
     def stop(self) -> None:
         logger.info("Stopping event loop and saving not finished jobs")
+        if self._ordering is not None:
+            self._ordering.save_history()
+        self._executor.shutdown()
+        for executor in self._executors.values():
+            executor.shutdown()
         self.save_jobs()
@@ -0,0 +1,59 @@
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple, Union
+
+from src.job import Job, JobRegistry
+
+BINARY_MAGIC = b"JOBGRAPH1\n"
+
+
+def collect_graph(jobs: Iterable[Job]) -> List[Job]:
+    # Every job reachable through dependencies, exactly once, dependencies first
+    ordered: List[Job] = []
+    seen: Set[str] = set()
+    for root in jobs:
+        stack: List[Tuple[Job, bool]] = [(root, False)]
+        while stack:
+            job, expanded = stack.pop()
+            if expanded:
+                ordered.append(job)
+                continue
+            if job.job_id in seen:
+                continue
+            seen.add(job.job_id)
+            stack.append((job, True))
+            stack.extend((dep, False) for dep in reversed(job.dependencies) if dep.job_id not in seen)
+    return ordered
+
+
+def serialize_graph(jobs: Iterable[Job], binary: bool = False) -> Union[str, bytes]:
+    records = [job.to_record() for job in collect_graph(jobs)]
+    if binary:
+        return BINARY_MAGIC + zlib.compress(json.dumps(records, separators=(",", ":")).encode("utf-8"))
+    return json.dumps(records)
+
+
+def parse_graph(payload: Union[str, bytes]) -> List[Dict[str, Any]]:
+    if isinstance(payload, bytes):
+        if payload.startswith(BINARY_MAGIC):
+            return json.loads(zlib.decompress(payload[len(BINARY_MAGIC):]).decode("utf-8"))
+        payload = payload.decode("utf-8")
+    # State files written before records were stored as objects hold one JSON string per job
+    return [json.loads(entry) if isinstance(entry, str) else entry for entry in json.loads(payload)]
+
+
+def load_graph(
+    records: Iterable[Dict[str, Any]], func_resolver: Callable[[str], Callable], job_registry: JobRegistry
+) -> List[Job]:
+    # Create every job first, then link dependency IDs, so record order does not matter
+    records = list(records)
+    jobs = [Job.create_from_data(data, func_resolver, job_registry, link_dependencies=False) for data in records]
+    for job, data in zip(jobs, records):
+        job.link_dependencies(data.get("dependency_ids", []), job_registry)
+    return jobs
+
+
+def deserialize_graph(
+    payload: Union[str, bytes], func_resolver: Callable[[str], Callable], job_registry: JobRegistry
+) -> List[Job]:
+    return load_graph(parse_graph(payload), func_resolver, job_registry)
@@ -0,0 +1,44 @@
+import sys
+from typing import Dict, Optional, Tuple
+
+from src.job import Job
+
+# Step budget when only the time slice bounds a dispatch
+UNBOUNDED_STEPS = sys.maxsize
+
+
+class SlicePolicy:
+    # How far a job may advance per dispatch: up to max_steps steps, cut short once time_slice seconds
+    # have passed. With adaptive tuning the step budget of each function moves towards the number of
+    # its steps that fit in time_slice, so cheap chatty generators batch many steps per dispatch while
+    # slow steps still hand the worker back after one. max_steps defaults to one step without a
+    # time_slice and to no step limit with one.
+    def __init__(
+        self,
+        max_steps: Optional[int] = None,
+        time_slice: Optional[float] = None,
+        adaptive: bool = False,
+        smoothing: float = 0.5,
+    ) -> None:
+        if adaptive and time_slice is None:
+            raise ValueError("Adaptive slicing needs a time_slice to aim for")
+        if max_steps is None:
+            max_steps = 1 if time_slice is None else UNBOUNDED_STEPS
+        self.max_steps = max_steps
+        self.time_slice = time_slice
+        self.adaptive = adaptive
+        self.smoothing = smoothing
+        self.budgets: Dict[str, float] = {}
+
+    def budget(self, job: Job) -> Tuple[int, Optional[float]]:
+        if not self.adaptive:
+            return self.max_steps, self.time_slice
+        return max(int(self.budgets.get(job.func_name, 1.0)), 1), self.time_slice
+
+    def record(self, job: Job, steps: int, seconds: float) -> None:
+        if not self.adaptive or steps <= 0:
+            return
+        fitting = self.time_slice * steps / seconds if seconds > 0 else float(self.max_steps)
+        target = min(max(fitting, 1.0), float(self.max_steps))
+        current = self.budgets.get(job.func_name, 1.0)
+        self.budgets[job.func_name] = current + self.smoothing * (target - current)
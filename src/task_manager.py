@@ -1,9 +1,14 @@
+import os
 import yaml
 import time
-import uuid
+import threading
 from typing import Dict, Any, List, Callable, Optional
 
-from src.job import Job
+from src.job import Job, JobStatus
+from src.metrics import SchedulerMetrics
+from src.plan import PlanError, load_plan
+from src.results import RESULTS_OF, create_channel, is_results_reference, results_of
+from src.retry import RetryPolicy
 from src.scheduler import Scheduler
 from src.utils import func_resolver
 import logging
@@ -12,10 +17,14 @@ logger = logging.getLogger(__name__)
 
 
 class TaskManager:
-    def __init__(self, yaml_file: str) -> None:
+    def __init__(self, yaml_file: str, executor: str = "thread", metrics: Optional[SchedulerMetrics] = None) -> None:
         self.yaml_file: str = yaml_file
         self.jobs: Dict[str, Job] = {}
-        self.scheduler: Scheduler = Scheduler()
+        # Compiled config each live job was created from, compared on reload
+        self.configs: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[int] = None
+        self._stop_watching = threading.Event()
+        self.scheduler: Scheduler = Scheduler(executor=executor, metrics=metrics)
         try:
             self.load_yaml()
         except Exception as e:
@@ -24,13 +33,13 @@ class TaskManager:
 
     def load_yaml(self) -> None:
         try:
-            with open(self.yaml_file, "r") as file:
-                config: Dict[str, Any] = yaml.safe_load(file)
-                for job_conf in config["jobs"]:
-                    job: Job = self.create_job_from_config(job_conf)
-                    self.jobs[job_conf["id"]] = job
-                    self.scheduler.schedule(job)
-                    logger.info("Scheduled job with ID %s from YAML configuration", job_conf["id"])
+            self._mtime = os.stat(self.yaml_file).st_mtime_ns
+            # Dependencies come first in the compiled plan, so every dependency is already created
+            for job_conf in load_plan(self.yaml_file):
+                self.schedule_from_config(job_conf)
+        except PlanError as e:
+            logger.error("Invalid job file %s: %s", self.yaml_file, e)
+            raise RuntimeError(f"Invalid job file {self.yaml_file}: {e}") from e
         except yaml.YAMLError as e:
             logger.error("Error parsing YAML file %s: %s", self.yaml_file, e)
             raise RuntimeError(f"Error parsing YAML file: {self.yaml_file}") from e
@@ -38,25 +47,131 @@ class TaskManager:
             logger.error("Error opening file %s: %s", self.yaml_file, e)
             raise RuntimeError(f"Error opening file: {self.yaml_file}") from e
 
-    def create_job_from_config(self, config: Dict[str, Any]) -> Job:
-        job_id: str = str(uuid.uuid4())
+    def schedule_from_config(self, job_conf: Dict[str, Any]) -> Job:
+        job: Job = self.create_job_from_config(job_conf)
+        self.schedule(job_conf, job)
+        return job
+
+    def schedule(self, job_conf: Dict[str, Any], job: Job) -> None:
+        self.jobs[job_conf["id"]] = job
+        self.configs[job_conf["id"]] = job_conf
+        self.scheduler.schedule(job)
+        logger.info("Scheduled job with ID %s from YAML configuration", job_conf["id"])
+
+    def reload(self) -> None:
+        # Applies the current job file to the live jobs, touching only what changed: removed jobs are
+        # cancelled, new and changed jobs are scheduled (a changed job replaces its old version), and
+        # unfinished jobs waiting on a replaced job are replaced too. Everything else, running or
+        # finished, is kept. Every new job is built before anything is cancelled, so a file that fails
+        # to load or build leaves the current jobs alone. Must run on the scheduler loop, see watch()
+        try:
+            plan = load_plan(self.yaml_file)
+        except (PlanError, yaml.YAMLError, IOError) as e:
+            logger.error("Keeping current jobs, reloading %s failed: %s", self.yaml_file, e)
+            return
+
+        plan_ids = {job_conf["id"] for job_conf in plan}
+        removed = [job_id for job_id in self.jobs if job_id not in plan_ids]
+        try:
+            built = self._build_changed(plan)
+        except Exception as e:
+            logger.error("Keeping current jobs, building jobs of %s failed: %r", self.yaml_file, e)
+            return
+
+        for job_id in removed:
+            self.scheduler.cancel(job_id)
+            del self.jobs[job_id]
+            del self.configs[job_id]
+        plan_configs = {job_conf["id"]: job_conf for job_conf in plan}
+        for job_id, job in built.items():
+            if job_id in self.jobs:
+                self.scheduler.cancel(job_id)
+            self.schedule(plan_configs[job_id], job)
+        logger.info(
+            "Reloaded %s: %s jobs scheduled or replaced, %s removed", self.yaml_file, len(built), len(removed)
+        )
+
+    def _build_changed(self, plan: List[Dict[str, Any]]) -> Dict[str, Job]:
+        # New versions of the plan's new and changed jobs, without touching the live ones
+        jobs = {job_conf["id"]: self.jobs[job_conf["id"]] for job_conf in plan if job_conf["id"] in self.jobs}
+        built: Dict[str, Job] = {}
+        for job_conf in plan:
+            job_id = job_conf["id"]
+            job = jobs.get(job_id)
+            if job is not None and job_conf == self.configs[job_id]:
+                finished = job.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+                if finished or not built.keys() & set(job_conf["dependencies"]):
+                    continue
+            built[job_id] = jobs[job_id] = self.create_job_from_config(job_conf, jobs)
+        return built
+
+    def watch(self, poll_interval: float = 1.0) -> None:
+        # Polls the job file's modification time until stop(); reloads run on the scheduler loop
+        while not self._stop_watching.wait(poll_interval):
+            try:
+                mtime = os.stat(self.yaml_file).st_mtime_ns
+            except OSError as e:
+                logger.warning("Cannot check job file %s: %s", self.yaml_file, e)
+                continue
+            if mtime != self._mtime:
+                self._mtime = mtime
+                logger.info("Job file %s changed, reloading", self.yaml_file)
+                self.scheduler.run_in_loop(self.reload)
+
+    def create_job_from_config(self, config: Dict[str, Any], jobs: Optional[Dict[str, Job]] = None) -> Job:
+        # YAML ids are used as job ids, so they stay the same across runs and in the state file.
+        # Dependencies are looked up in jobs, the live jobs by default
+        jobs = self.jobs if jobs is None else jobs
+        job_id: str = str(config["id"])
         func: Callable = func_resolver(config["function"])
-        args: Any = config["args"]
+        args: Any = config.get("args", [])
         start_at: float = time.time() + int(config.get("start_at", 0))
         dependency_ids: Optional[List[str]] = config.get("dependencies", [])
-        dependencies: List[Job] = [self.jobs[dep_id] for dep_id in dependency_ids if dep_id in self.jobs]
+        dependencies: List[Job] = [jobs[dep_id] for dep_id in dependency_ids]
+        args = [self.resolve_results_reference(arg, dependencies, jobs) for arg in args]
         job = Job(
             func=func,
             job_id=job_id,
             args=args,
             start_at=start_at,
             max_working_time=-1,
-            max_tries=1,
+            max_tries=int(config.get("max_tries", 1)),
             dependencies=dependencies,
+            executor=config.get("executor"),
+            priority=int(config.get("priority", 0)),
+            queue=config.get("queue", "default"),
+            retry_policy=RetryPolicy.from_record(config.get("retry")),
+            results=create_channel(config.get("results")),
         )
         logger.info("Creating job with ID %s from config", job_id)
         return job
 
-    def run(self) -> None:
+    def resolve_results_reference(
+        self, arg: Any, dependencies: List[Job], jobs: Optional[Dict[str, Job]] = None
+    ) -> Any:
+        # {results_of: <config id>} streams another job's results and implies a dependency on it
+        if not is_results_reference(arg):
+            return arg
+        upstream = (self.jobs if jobs is None else jobs)[str(arg[RESULTS_OF])]
+        if upstream not in dependencies:
+            dependencies.append(upstream)
+        return results_of(upstream.job_id)
+
+    def run(self, watch_interval: Optional[float] = None) -> None:
+        # With watch_interval the job file is watched and run() keeps serving it until stop()
         logger.info("Starting TaskManager scheduler")
-        self.scheduler.run()
+        if watch_interval is None:
+            self.scheduler.run()
+            return
+        self._stop_watching.clear()
+        watcher = threading.Thread(target=self.watch, args=(watch_interval,), name="job-file-watcher", daemon=True)
+        watcher.start()
+        try:
+            self.scheduler.run(wait_for_jobs=True)
+        finally:
+            self._stop_watching.set()
+            watcher.join()
+
+    def stop(self) -> None:
+        self._stop_watching.set()
+        self.scheduler.request_stop()
@@ -0,0 +1,132 @@
+import json
+import time
+import pstats
+import random
+import cProfile
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOBS_PID = 1
+WORKERS_PID = 2
+
+# Recorder of the scheduler currently running with tracing on; Job.run looks it up once per dispatch
+active_tracer: Optional["TraceRecorder"] = None
+
+
+class TraceRecorder:
+    # Collects a Chrome trace-event timeline (chrome://tracing, ui.perfetto.dev): one track per job with
+    # its ready/blocked/delayed/running states as spans, and its steps on the job's track or, with
+    # tracks="worker", on the track of the thread that ran them. Functions listed in profile_functions
+    # are profiled with cProfile in a sampled fraction of dispatches and dumped next to the trace.
+    def __init__(
+        self,
+        trace_file: str,
+        tracks: str = "job",
+        profile_functions: Iterable[str] = (),
+        profile_sample_rate: float = 1.0,
+    ) -> None:
+        if tracks not in ("job", "worker"):
+            raise ValueError(f"Unknown trace track mode: {tracks}")
+        self.trace_file = trace_file
+        self.tracks = tracks
+        self.profile_functions = set(profile_functions)
+        self.profile_sample_rate = profile_sample_rate
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._job_tracks: Dict[str, int] = {}
+        self._worker_tracks: Dict[int, int] = {}
+        self._states: Dict[str, Tuple[str, float]] = {}
+        self._profiles: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _job_track(self, job: Any) -> int:
+        with self._lock:
+            track = self._job_tracks.get(job.job_id)
+            if track is None:
+                track = self._job_tracks[job.job_id] = len(self._job_tracks) + 1
+                self._metadata(JOBS_PID, track, f"{job.func_name} {job.job_id}")
+        return track
+
+    def _worker_track(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            track = self._worker_tracks.get(ident)
+            if track is None:
+                track = self._worker_tracks[ident] = len(self._worker_tracks) + 1
+                self._metadata(WORKERS_PID, track, threading.current_thread().name)
+        return track
+
+    def _metadata(self, pid: int, tid: int, name: str) -> None:
+        self.events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+
+    def state(self, job: Any, state: Optional[str]) -> None:
+        # Ends the job's current state span and starts the next one; None only ends it
+        now = self._now()
+        previous = self._states.pop(job.job_id, None)
+        if previous is not None:
+            name, started = previous
+            self.events.append({
+                "name": name, "cat": "state", "ph": "X", "ts": started, "dur": now - started,
+                "pid": JOBS_PID, "tid": self._job_track(job),
+            })
+        if state is not None:
+            self._job_track(job)
+            self._states[job.job_id] = (state, now)
+
+    def finished(self, job: Any, outcome: str, **args: Any) -> None:
+        self.state(job, None)
+        self.events.append({
+            "name": outcome, "cat": "state", "ph": "i", "s": "t", "ts": self._now(),
+            "pid": JOBS_PID, "tid": self._job_track(job), "args": args,
+        })
+
+    def step(self, job: Any, coroutine: Any) -> Any:
+        started = self._now()
+        try:
+            return coroutine.send(None)
+        finally:
+            if self.tracks == "worker":
+                pid, tid = WORKERS_PID, self._worker_track()
+            else:
+                pid, tid = JOBS_PID, self._job_track(job)
+            self.events.append({
+                "name": "step", "cat": job.func_name, "ph": "X", "ts": started, "dur": self._now() - started,
+                "pid": pid, "tid": tid, "args": {"job_id": job.job_id},
+            })
+
+    def profiler_for(self, job: Any) -> Optional[cProfile.Profile]:
+        if job.func_name not in self.profile_functions or random.random() >= self.profile_sample_rate:
+            return None
+        return cProfile.Profile()
+
+    def add_profile(self, job: Any, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            stats = self._profiles.get(job.func_name)
+            if stats is None:
+                self._profiles[job.func_name] = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+
+    def write(self) -> None:
+        for job_id, (name, started) in list(self._states.items()):
+            # States still open when the run ends, e.g. jobs blocked on outside dependencies
+            self.events.append({
+                "name": name, "cat": "state", "ph": "X", "ts": started, "dur": self._now() - started,
+                "pid": JOBS_PID, "tid": self._job_tracks.get(job_id, 0),
+            })
+        self._states.clear()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": JOBS_PID, "args": {"name": "jobs"}},
+            {"name": "process_name", "ph": "M", "pid": WORKERS_PID, "args": {"name": "workers"}},
+        ] + self.events
+        with open(self.trace_file, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        for func_name, stats in self._profiles.items():
+            stats.dump_stats(f"{self.trace_file}.{func_name}.prof")
+        logger.info("Wrote trace with %s events to %s", len(events), self.trace_file)
@@ -1,16 +1,18 @@
 import os
+import codecs
 import shutil
 import requests
-import logging.config
+import logging
 from functools import wraps
 from html.parser import HTMLParser
-from typing import Generator, Any, Callable
+from typing import Generator, Any, Callable, Dict, Iterable, Optional, Sequence
 
-from config.logger import LOGGING
+from src.http_client import get_http_client
 
-logging.config.dictConfig(LOGGING)
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 def coroutine(f: Callable) -> Callable:
     @wraps(f)
@@ -30,7 +32,9 @@ def func_resolver(func_name: str) -> Any:
         "delete_file": FileSystemOperations.delete_file,
         "write_to_file": FileOperations.write_to_file,
         "read_from_file": FileOperations.read_from_file,
+        "write_lines": FileOperations.write_lines,
         "html_to_txt_pipeline": NetworkOperationsPipe.html_to_txt_pipeline,
+        "html_to_txt_batch": NetworkOperationsPipe.html_to_txt_batch,
         "write_to_file_pipeline": NetworkOperationsPipe.write_to_file,
         "clean_html_chunks": NetworkOperationsPipe.clean_html_chunks,
     }
@@ -39,7 +43,6 @@ def func_resolver(func_name: str) -> Any:
 
 class FileSystemOperations:
     @staticmethod
-    @coroutine
     def create_directory(path: str) -> Generator:
         try:
             os.makedirs(path)
@@ -48,7 +51,6 @@ class FileSystemOperations:
             yield f"Directory exists at {path}"
 
     @staticmethod
-    @coroutine
     def delete_directory(path: str) -> Generator:
         try:
             shutil.rmtree(path)
@@ -57,7 +59,6 @@ class FileSystemOperations:
             yield "Directory not found"
 
     @staticmethod
-    @coroutine
     def create_file(path: str) -> Generator:
         try:
             with open(path, "w") as file:
@@ -67,7 +68,6 @@ class FileSystemOperations:
             yield f"Error creating file at {path}: {e}"
 
     @staticmethod
-    @coroutine
     def delete_file(path: str) -> Generator:
         try:
             os.remove(path)
@@ -78,7 +78,6 @@ class FileSystemOperations:
 
 class FileOperations:
     @staticmethod
-    @coroutine
     def write_to_file(path: str, content: str) -> Generator:
         try:
             with open(path, "w") as file:
@@ -89,7 +88,17 @@ class FileOperations:
             raise e
 
     @staticmethod
-    @coroutine
+    def write_lines(path: str, lines: Iterable[Any]) -> Generator:
+        # Consumes an upstream job's results one value at a time
+        count = 0
+        with open(path, "w") as file:
+            for line in lines:
+                line = str(line)
+                file.write(line if line.endswith("\n") else line + "\n")
+                count += 1
+        yield f"{count} lines written to {path}"
+
+    @staticmethod
     def read_from_file(path: str) -> Generator:
         try:
             with open(path, "r") as file:
@@ -104,18 +113,27 @@ class ChunkHTMLParser(HTMLParser):
         super().__init__()
         self.text_parts = []
         self.ignore_data = False
+        self.emitted = False
+        # The last text part may continue in the next chunk
+        self.open_text = False
 
     def handle_starttag(self, tag, attrs):
+        self.open_text = False
         if tag in ("script", "style"):
             self.ignore_data = True
 
     def handle_endtag(self, tag):
+        self.open_text = False
         if tag in ("script", "style"):
             self.ignore_data = False
 
     def handle_data(self, data):
         if not self.ignore_data:
-            self.text_parts.append(data)
+            if self.open_text and self.text_parts:
+                self.text_parts[-1] += data
+            else:
+                self.text_parts.append(data)
+            self.open_text = True
 
     def handle_entityref(self, name):
         self.text_parts.append(self.unescape("&" + name + ";"))
@@ -123,34 +141,161 @@ class ChunkHTMLParser(HTMLParser):
     def handle_charref(self, name):
         self.text_parts.append(self.unescape("&#" + name + ";"))
 
+    def close(self):
+        super().close()
+        self.open_text = False
+
     def get_data(self):
         return " ".join(part.strip() for part in self.text_parts if part.strip())
 
+    def checkpoint(self) -> Dict[str, Any]:
+        # State between two chunks, enough for a new parser to carry on where this one stopped
+        return {
+            "rawdata": self.rawdata,
+            "cdata_elem": self.cdata_elem,
+            "lasttag": self.lasttag,
+            "text_parts": list(self.text_parts),
+            "ignore_data": self.ignore_data,
+            "emitted": self.emitted,
+            "open_text": self.open_text,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.rawdata = state["rawdata"]
+        self.lasttag = state["lasttag"]
+        if state["cdata_elem"]:
+            self.set_cdata_mode(state["cdata_elem"])
+        self.text_parts = list(state["text_parts"])
+        self.ignore_data = state["ignore_data"]
+        self.emitted = state["emitted"]
+        self.open_text = state["open_text"]
+
+    def pop_data(self):
+        # Text completed since the previous call; consumed parts are released
+        held = self.text_parts.pop() if self.open_text and self.text_parts else None
+        text = self.get_data()
+        self.text_parts = [held] if held is not None else []
+        if not text:
+            return ""
+        if self.emitted:
+            text = " " + text
+        self.emitted = True
+        return text
+
 
 class NetworkOperationsPipe:
     @staticmethod
-    @coroutine
-    def html_to_txt_pipeline(url: str, path: str) -> Generator:
-        output = NetworkOperationsPipe().clean_html_chunks()
-        output.send(path)
+    def html_to_txt_pipeline(url: str, path: str, checkpoint: Optional[Dict[str, Any]] = None) -> Generator:
+        # The checkpoint (the job's, persisted with it) is updated after every chunk with the bytes
+        # consumed, the size of the text file and the parser state. A later try asks only for the
+        # missing bytes, and a page that was saved completely is not fetched again while unchanged
+        checkpoint = checkpoint if checkpoint is not None else {}
+        if checkpoint and not (os.path.exists(path) and os.path.getsize(path) >= checkpoint.get("written", 0)):
+            logger.warning("Output %s does not match the checkpoint, fetching %s from the start", path, url)
+            checkpoint.clear()
+        output = None
+        # Multibyte characters may be split across chunks
+        decoder = codecs.getincrementaldecoder("utf-8")()
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            for chunk in response.iter_content(chunk_size=None):
-                if chunk:
-                    yield output.send(chunk.decode("utf-8"))
+            # Closing the response returns its connection to the shared pool
+            # Offsets count bytes on the wire, which only match the page's bytes without compression
+            headers = {"Accept-Encoding": "identity", **NetworkOperationsPipe.resume_headers(checkpoint)}
+            with get_http_client().get(url, stream=True, headers=headers) as response:
+                if response.status_code == 304:
+                    logger.info("Page %s is unchanged since it was saved to %s", url, path)
+                    return
+                if response.status_code == 416:
+                    # The saved offset is past the end of the page, so the next try starts over
+                    checkpoint.clear()
+                response.raise_for_status()
+                offset = NetworkOperationsPipe.resume_offset(checkpoint, response)
+                parser = ChunkHTMLParser()
+                if offset:
+                    logger.info("Resuming %s at byte %s", url, offset)
+                    parser.restore(checkpoint["parser"])
+                else:
+                    checkpoint.clear()
+                output = NetworkOperationsPipe.clean_html_chunks(parser, checkpoint.get("written"))
+                output.send(path)
+                checkpoint["etag"] = response.headers.get("ETag")
+                checkpoint["last_modified"] = response.headers.get("Last-Modified")
+                # A server compressing anyway gives no offsets to resume at; such a page is fetched again whole
+                encoded = response.headers.get("Content-Encoding", "identity").lower() != "identity"
+                received = offset
+                # Bounded reads, so a dropped connection loses at most one chunk of progress
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        written = output.send(decoder.decode(chunk))
+                        received += len(chunk)
+                        checkpoint.update(written=written, parser=parser.checkpoint())
+                        if not encoded:
+                            # Bytes of a character split across chunks are fetched again on resume
+                            checkpoint["offset"] = received - len(decoder.getstate()[0])
+                        yield
+            output.send(decoder.decode(b"", final=True))
+            output.close()
+            checkpoint["complete"] = True
         except requests.exceptions.RequestException as e:
             logger.error("RequestException while fetching %s: %s", url, e)
             raise e
+        finally:
+            if output is not None:
+                output.close()
+
+    @staticmethod
+    def resume_headers(checkpoint: Dict[str, Any]) -> Dict[str, str]:
+        validator = checkpoint.get("etag") or checkpoint.get("last_modified")
+        if checkpoint.get("complete"):
+            headers = {}
+            if checkpoint.get("etag"):
+                headers["If-None-Match"] = checkpoint["etag"]
+            if checkpoint.get("last_modified"):
+                headers["If-Modified-Since"] = checkpoint["last_modified"]
+            return headers
+        # Without a validator the page may have changed in between, so it is fetched whole
+        if checkpoint.get("offset") and validator:
+            return {"Range": f"bytes={checkpoint['offset']}-", "If-Range": validator}
+        return {}
+
+    @staticmethod
+    def resume_offset(checkpoint: Dict[str, Any], response: requests.Response) -> int:
+        # A full 200 response means the server ignored the range or the page changed
+        if response.status_code != 206 or checkpoint.get("complete"):
+            return 0
+        offset = checkpoint["offset"]
+        if not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+            checkpoint.clear()
+            raise requests.exceptions.RequestException(
+                f"Unexpected Content-Range {response.headers.get('Content-Range')} for offset {offset}"
+            )
+        return offset
+
+    @staticmethod
+    def fetch_to_file(page: Sequence[str]) -> None:
+        url, path = page
+        for _ in NetworkOperationsPipe.html_to_txt_pipeline(url, path):
+            pass
+
+    @staticmethod
+    def html_to_txt_batch(pages: Sequence[Sequence[str]]) -> Generator:
+        # pages is a list of [url, path] pairs fetched concurrently over the shared HTTP client
+        client = get_http_client()
+        for (url, path), _ in client.fetch_many(pages, NetworkOperationsPipe.fetch_to_file):
+            yield f"Page {url} saved to {path}"
 
     @staticmethod
     @coroutine
-    def write_to_file() -> Generator:
+    def write_to_file(resume_at: Optional[int] = None) -> Generator:
+        # Yields the file position after each write; resume_at continues a file written before
         path = yield
         try:
-            with open(path, "w") as file:
+            with open(path, "r+" if resume_at else "w") as file:
+                if resume_at:
+                    # Text written after the checkpoint is written again
+                    file.seek(resume_at)
+                    file.truncate()
                 while True:
-                    chunk = yield
+                    chunk = yield file.tell()
                     file.write(chunk)
                     file.flush()
         except IOError as e:
@@ -161,21 +306,27 @@ class NetworkOperationsPipe:
 
     @staticmethod
     @coroutine
-    def clean_html_chunks() -> Generator:
-        output = NetworkOperationsPipe.write_to_file()
-        parser = ChunkHTMLParser()
+    def clean_html_chunks(parser: Optional[ChunkHTMLParser] = None, resume_at: Optional[int] = None) -> Generator:
+        output = NetworkOperationsPipe.write_to_file(resume_at)
+        parser = parser if parser is not None else ChunkHTMLParser()
         path = yield
-        output.send(path)
+        written = output.send(path)
         try:
             while True:
-                chunk = yield
+                chunk = yield written
                 parser.feed(chunk)
-                parsed_text = parser.get_data()
-                output.send(parsed_text)
+                parsed_text = parser.pop_data()
+                if parsed_text:
+                    written = output.send(parsed_text)
         except UnicodeDecodeError as e:
             logger.error("UnicodeDecodeError while parsing HTML: %s", e)
             raise e
         except GeneratorExit:
+            parser.close()
+            parsed_text = parser.pop_data()
+            if parsed_text:
+                output.send(parsed_text)
+            output.close()
             logger.info("Html document has been parsed correctly")
         except Exception as e:
             logger.error("Unexpected error: %s", e)
@@ -0,0 +1,119 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.admission import SchedulerFullError
+from src.async_scheduler import AsyncScheduler
+from src.job import Job, JobStatus
+from src.scheduler import Scheduler
+from src.utils import FileSystemOperations
+
+
+def _single_step(name):
+    yield name
+
+
+def test_reject_raises_when_full(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=1, admission="reject")
+    scheduler.submit(Job(_single_step, "first", args=["first"]))
+    with pytest.raises(SchedulerFullError):
+        scheduler.submit(Job(_single_step, "second", args=["second"]))
+
+
+def test_handle_resolves_with_result(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=2)
+    handle = scheduler.submit(Job(_single_step, "job", args=["job"]))
+    assert not handle.done()
+    scheduler.run()
+    assert handle.wait(timeout=0)
+    assert handle.status == JobStatus.COMPLETED
+    assert handle.result() is None
+
+
+def test_block_waits_for_capacity_from_producer_thread(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), executor="thread", max_pending=2)
+    loop = threading.Thread(target=scheduler.run, kwargs={"wait_for_jobs": True})
+    loop.start()
+    while not scheduler.running:
+        time.sleep(0.001)
+    handles = [scheduler.submit(Job(_single_step, str(i), args=[i]), timeout=5) for i in range(20)]
+    assert all(handle.wait(timeout=5) for handle in handles)
+    scheduler.request_stop()
+    loop.join(timeout=5)
+    assert not loop.is_alive()
+    assert scheduler._admitted == 0
+
+
+def test_spill_admits_jobs_back_as_capacity_frees(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=1, admission="spill")
+    scheduler.submit(Job(_single_step, "first", args=["first"]))
+    # Spilled jobs are rebuilt from disk, so they need a function the resolver knows
+    spilled = [
+        scheduler.submit(Job(FileSystemOperations.create_directory, f"dir{i}", args=[str(tmp_path / f"dir{i}")]))
+        for i in range(3)
+    ]
+    assert all(handle.spilled for handle in spilled)
+    assert len(list(scheduler.pending_jobs())) == 4
+
+    scheduler.run()
+    assert all(handle.status == JobStatus.COMPLETED for handle in spilled)
+    assert all((tmp_path / f"dir{i}").is_dir() for i in range(3))
+
+
+def test_spill_rejects_jobs_it_cannot_rebuild(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=1, admission="spill")
+    first = scheduler.submit(Job(_single_step, "first", args=["first"]))
+    with pytest.raises(SchedulerFullError, match="_single_step is not resolved by func_resolver"):
+        scheduler.submit(Job(_single_step, "second", args=["second"]))
+    scheduler.run()
+    assert first.status == JobStatus.COMPLETED
+
+
+def test_block_before_run_raises_instead_of_waiting(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=1)
+    scheduler.submit(Job(_single_step, "first", args=["first"]))
+    with pytest.raises(SchedulerFullError, match="not running"):
+        scheduler.submit(Job(_single_step, "second", args=["second"]))
+
+
+def test_handle_wait_returns_false_on_timeout(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    handle = scheduler.submit(Job(_single_step, "job", args=["job"]))
+    assert handle.wait(timeout=0.01) is False
+
+
+@pytest.mark.parametrize("max_pending", [1, 2])
+def test_spilled_job_waits_for_spilled_dependency(tmp_path, max_pending):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), max_pending=max_pending, admission="spill")
+    admitted = [
+        Job(FileSystemOperations.create_directory, name, args=[str(tmp_path / name)]) for name in ("a", "x")
+    ][:max_pending]
+    for job in admitted:
+        scheduler.submit(job)
+    parent = Job(FileSystemOperations.create_directory, "b", args=[str(tmp_path / "b")])
+    child = Job(FileSystemOperations.create_directory, "c", args=[str(tmp_path / "b" / "c")], dependencies=[parent])
+    spilled = [scheduler.submit(parent), scheduler.submit(child)]
+    assert all(handle.spilled for handle in spilled)
+
+    scheduler.run()
+    assert all(handle.wait(timeout=0) for handle in spilled)
+    assert [handle.status for handle in spilled] == [JobStatus.COMPLETED, JobStatus.COMPLETED]
+    assert (tmp_path / "b" / "c").is_dir()
+
+
+def test_submit_async_awaits_capacity(tmp_path):
+    scheduler = AsyncScheduler(state_file=str(tmp_path / "state.json"))
+    scheduler.max_pending = 1
+
+    async def produce():
+        runner = asyncio.create_task(scheduler.run_async(wait_for_jobs=True))
+        handles = [await scheduler.submit_async(Job(_single_step, str(i), args=[i]), timeout=5) for i in range(5)]
+        await asyncio.gather(*(handle.wait_async() for handle in handles))
+        scheduler.request_stop()
+        await runner
+        return handles
+
+    handles = asyncio.run(produce())
+    assert all(handle.status == JobStatus.COMPLETED for handle in handles)
@@ -0,0 +1,115 @@
+import time
+import asyncio
+
+from src.async_scheduler import AsyncScheduler
+from src.job import Job, JobStatus
+from src.retry import RetryPolicy
+
+
+def _two_steps(log):
+    log.append("generator step")
+    yield
+    log.append("generator step")
+    yield
+
+
+async def _fetch(log, delay=0.01):
+    await asyncio.sleep(delay)
+    log.append("async done")
+
+
+def test_async_scheduler_runs_generator_and_async_jobs():
+    log = []
+    scheduler = AsyncScheduler()
+    generator_job = Job(_two_steps, "generator", args=[log])
+    async_job = Job(_fetch, "async", args=[log], dependencies=[generator_job])
+    scheduler.add_job(async_job)
+    scheduler.add_job(generator_job)
+
+    scheduler.run()
+
+    assert log == ["generator step", "generator step", "async done"]
+    assert generator_job.status == JobStatus.COMPLETED
+    assert async_job.status == JobStatus.COMPLETED
+
+
+def test_async_scheduler_limits_concurrency_to_pool_size():
+    active = {"now": 0, "peak": 0}
+
+    async def tracked():
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+
+    scheduler = AsyncScheduler(pool_size=2)
+    for i in range(6):
+        scheduler.add_job(Job(tracked, f"job-{i}"))
+
+    scheduler.run()
+
+    assert active["peak"] == 2
+
+
+def test_async_scheduler_cancels_jobs_over_max_working_time():
+    scheduler = AsyncScheduler()
+    job = Job(_fetch, "slow", args=[[], 10], max_working_time=0.05)
+    scheduler.add_job(job)
+
+    scheduler.run()
+
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Max working time exceeded"
+
+
+def test_timeout_raised_by_job_is_retried():
+    attempts = []
+
+    async def times_out():
+        attempts.append(None)
+        if len(attempts) < 3:
+            raise asyncio.TimeoutError()
+        return 42
+
+    scheduler = AsyncScheduler(retry_policy=RetryPolicy(base_delay=0, jitter=0))
+    job = Job(times_out, "flaky", max_tries=3)
+    handle = scheduler.submit(job)
+    scheduler.run()
+
+    assert len(attempts) == 3
+    assert job.status == JobStatus.COMPLETED
+    assert handle.result() == 42
+
+
+def test_generator_job_return_value_is_kept():
+    def returns():
+        yield
+        return "done"
+
+    scheduler = AsyncScheduler()
+    job = Job(returns, "returns")
+    scheduler.add_job(job)
+    scheduler.run()
+    assert job.result == "done"
+
+
+def test_cancel_stops_queued_and_running_jobs():
+    log = []
+    scheduler = AsyncScheduler(pool_size=2)
+
+    async def canceller():
+        await asyncio.sleep(0.05)
+        assert scheduler.cancel("running")
+
+    running = Job(_fetch, "running", args=[log, 10])
+    queued = Job(_fetch, "queued", args=[log])
+    for job in (running, queued, Job(canceller, "canceller")):
+        scheduler.add_job(job)
+    assert scheduler.cancel("queued")
+    started = time.monotonic()
+    scheduler.run()
+
+    assert time.monotonic() - started < 5
+    assert log == []
+    assert (running.status, running.error) == (JobStatus.FAILED, "Cancelled")
+    assert (queued.status, queued.error) == (JobStatus.FAILED, "Cancelled")
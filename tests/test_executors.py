@@ -0,0 +1,159 @@
+import os
+import time
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.executors import SerialExecutor, ThreadJobExecutor, create_executor
+from src.job import Job, JobStatus
+from src.scheduler import Scheduler
+from src.utils import FileOperations, FileSystemOperations, func_resolver
+
+
+def _wait_for_peers(barrier):
+    barrier.wait()
+    yield
+
+
+def _no_steps():
+    return
+    yield
+
+
+def test_create_executor_rejects_unknown_name():
+    with pytest.raises(ValueError):
+        create_executor("fiber", 4)
+
+
+def test_serial_executor_captures_stop_iteration():
+    job = Job(_no_steps, "empty")
+    future = SerialExecutor().submit(job)
+    assert isinstance(future.exception(), StopIteration)
+
+
+def test_thread_executor_runs_steps_concurrently():
+    pool_size = 4
+    barrier = threading.Barrier(pool_size, timeout=5)
+    scheduler = Scheduler(pool_size=pool_size, executor=ThreadJobExecutor(pool_size))
+    jobs = [Job(_wait_for_peers, f"job-{i}", args=[barrier]) for i in range(pool_size)]
+    for job in jobs:
+        scheduler.add_job(job)
+
+    scheduler.run()
+    scheduler._executor.shutdown()
+
+    assert all(job.status == JobStatus.COMPLETED for job in jobs)
+
+
+def test_process_executor_reports_results_and_failures(tmp_path, caplog):
+    scheduler = Scheduler(pool_size=2, state_file=str(tmp_path / "state.json"))
+    created = Job(FileSystemOperations.create_directory, "mkdir", args=[str(tmp_path / "out")], executor="process")
+    broken = Job(FileOperations.write_to_file, "write", args=[str(tmp_path / "missing" / "f.txt"), "x"],
+                 executor="process")
+    scheduler.add_job(created)
+    scheduler.add_job(broken)
+
+    scheduler.run()
+    scheduler.stop()
+
+    assert created.status == JobStatus.COMPLETED
+    assert (tmp_path / "out").is_dir()
+    assert isinstance(created.result, list)
+    assert broken.status == JobStatus.FAILED
+    assert broken.current_tries == broken.max_tries
+    # Logged in the job's process
+    assert any(record.message.startswith("IOError while writing") for record in caplog.records)
+
+
+def _stall(event):
+    event.wait(10)
+    yield
+
+
+def test_thread_executor_abandons_overdue_step(tmp_path):
+    release = threading.Event()
+    scheduler = Scheduler(pool_size=1, state_file=str(tmp_path / "state.json"), executor="thread")
+    stuck = Job(_stall, "stuck", args=[release], max_working_time=0.2)
+    quick = Job(_no_steps, "quick")
+    scheduler.add_job(stuck)
+    scheduler.add_job(quick)
+
+    started = time.time()
+    scheduler.run()
+    release.set()
+
+    assert time.time() - started < 5
+    assert stuck.status == JobStatus.FAILED
+    assert stuck.error == "Max working time exceeded"
+    assert quick.status == JobStatus.COMPLETED
+
+
+def test_process_executor_kills_overdue_job(tmp_path):
+    # Opening a FIFO blocks until a writer shows up, which never happens
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    scheduler = Scheduler(pool_size=2, state_file=str(tmp_path / "state.json"))
+    stuck = Job(FileOperations.read_from_file, "stuck", args=[str(fifo)], max_working_time=0.5, executor="process")
+    created = Job(FileSystemOperations.create_directory, "mkdir", args=[str(tmp_path / "out")], executor="process")
+    scheduler.add_job(stuck)
+    scheduler.add_job(created)
+
+    started = time.time()
+    scheduler.run()
+    scheduler.stop()
+
+    assert time.time() - started < 10
+    assert stuck.status == JobStatus.FAILED
+    assert created.status == JobStatus.COMPLETED
+
+
+def _count_starts(path, seconds):
+    with open(path, "a") as file:
+        file.write("start\n")
+    time.sleep(seconds)
+    yield
+
+
+def _fail_after_progress(checkpoint):
+    checkpoint["offset"] = checkpoint.get("offset", 0) + 100
+    raise IOError("connection dropped")
+    yield
+
+
+def _test_resolver(name):
+    return {"_count_starts": _count_starts, "_fail_after_progress": _fail_after_progress}.get(name) or func_resolver(name)
+
+
+def test_process_cancel_leaves_other_jobs_running(tmp_path):
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    scheduler = Scheduler(pool_size=2, state_file=str(tmp_path / "state.json"))
+    stuck = Job(FileOperations.read_from_file, "stuck", args=[str(fifo)], max_working_time=0.3, executor="process")
+    starts = tmp_path / "starts.txt"
+    sibling = Job(_count_starts, "count_starts", args=[str(starts), 1.0], executor="process")
+    scheduler.add_job(stuck)
+    scheduler.add_job(sibling)
+
+    with patch("src.executors.func_resolver", _test_resolver):
+        scheduler.run()
+    scheduler.stop()
+
+    assert stuck.status == JobStatus.FAILED
+    assert sibling.status == JobStatus.COMPLETED
+    assert starts.read_text() == "start\n"
+
+
+def test_process_job_checkpoint_is_sent_back(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    scheduler.retry_policy.base_delay = 0
+    job = Job(_fail_after_progress, "fail_after_progress", max_tries=1, executor="process")
+    scheduler.add_job(job)
+
+    with patch("src.executors.func_resolver", _test_resolver):
+        scheduler.run()
+    scheduler.stop()
+
+    assert job.status == JobStatus.FAILED
+    # Both tries ran in their own process and each continued from the checkpoint of the one before
+    assert job.checkpoint == {"offset": 200}
@@ -0,0 +1,206 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.http_client import HttpClient
+from src.job import Job, JobStatus
+from src.retry import RetryPolicy
+from src.scheduler import Scheduler
+from src.utils import NetworkOperationsPipe
+
+PAGE = b"<html><body><p>hello</p><script>ignored()</script><p>world</p></body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    httpd.client_ports = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_client_reuses_connections(server):
+    client = HttpClient(max_connections_per_host=1)
+    url = f"http://127.0.0.1:{server.server_port}/"
+    for _ in range(5):
+        assert client.get(url).content == PAGE
+    client.close()
+
+    assert len(server.client_ports) == 1
+
+
+def test_html_to_txt_batch_fetches_all_pages(server, tmp_path):
+    url = f"http://127.0.0.1:{server.server_port}/"
+    pages = [[url, str(tmp_path / f"page-{i}.txt")] for i in range(4)]
+
+    messages = list(NetworkOperationsPipe.html_to_txt_batch(pages))
+
+    assert len(messages) == len(pages)
+    for _, path in pages:
+        assert open(path).read() == "hello world"
+
+
+LARGE_PAGE = (
+    b"<html><head><style>p { color: red }</style></head><body>"
+    + b"".join(f"<p>paragraph {i} café &amp; crème</p>".encode() for i in range(20000))
+    + b"<script>ignored()</script></body></html>"
+)
+ETAG = '"v1"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, start = LARGE_PAGE, 0
+        # "accepted" compresses when the client accepts gzip, "always" regardless
+        encoded = self.server.gzip == "always" or (
+            self.server.gzip == "accepted" and "gzip" in self.headers.get("Accept-Encoding", "")
+        )
+        if encoded:
+            body = gzip.compress(body)
+        if self.headers.get("Range") and self.headers.get("If-Range") == ETAG:
+            start = int(self.headers["Range"][len("bytes="):-1])
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        # Ranges of a compressed response count compressed bytes
+        body = body[start:]
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        if encoded:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if self.server.cut_at:
+            # Dies inside a multibyte character of the first response
+            cut_at = len(body) // 2 if encoded else self.server.cut_at
+            self.wfile.write(body[:cut_at])
+            self.wfile.flush()
+            self.server.cut_at = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def range_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.seen = []
+    httpd.cut_at = None
+    httpd.gzip = None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("compression", [None, "accepted"])
+def test_retried_download_resumes_from_checkpoint(range_server, tmp_path, compression):
+    url = f"http://127.0.0.1:{range_server.server_port}/"
+    NetworkOperationsPipe.fetch_to_file([url, str(tmp_path / "expected.txt")])
+    range_server.gzip = compression
+    range_server.seen.clear()
+    cut_at = range_server.cut_at = LARGE_PAGE.index("é".encode(), len(LARGE_PAGE) // 2) + 1
+
+    path = tmp_path / "page.txt"
+    job = Job(NetworkOperationsPipe.html_to_txt_pipeline, "fetch", args=[url, str(path)], max_tries=1,
+              retry_policy=RetryPolicy(base_delay=0, jitter=0))
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    scheduler.add_job(job)
+    scheduler.run()
+
+    assert job.status == JobStatus.COMPLETED
+    assert path.read_text(encoding="utf-8") == (tmp_path / "expected.txt").read_text(encoding="utf-8")
+    first, second = range_server.seen
+    assert "Range" not in first
+    assert first["Accept-Encoding"] == second["Accept-Encoding"] == "identity"
+    # Resumed from the last whole chunk before the cut, not from byte zero
+    assert 0 < int(second["Range"][len("bytes="):-1]) < cut_at and second["If-Range"] == ETAG
+    assert job.to_record()["checkpoint"]["complete"] is True
+
+
+def test_compressed_download_is_fetched_again_whole(range_server, tmp_path):
+    url = f"http://127.0.0.1:{range_server.server_port}/"
+    NetworkOperationsPipe.fetch_to_file([url, str(tmp_path / "expected.txt")])
+    range_server.seen.clear()
+    range_server.gzip = "always"
+    range_server.cut_at = 1
+
+    path = tmp_path / "page.txt"
+    job = Job(NetworkOperationsPipe.html_to_txt_pipeline, "fetch", args=[url, str(path)], max_tries=1,
+              retry_policy=RetryPolicy(base_delay=0, jitter=0))
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    scheduler.add_job(job)
+    scheduler.run()
+
+    assert job.status == JobStatus.COMPLETED
+    assert path.read_text(encoding="utf-8") == (tmp_path / "expected.txt").read_text(encoding="utf-8")
+    assert len(range_server.seen) == 2 and "Range" not in range_server.seen[1]
+
+
+def test_unsatisfiable_range_clears_checkpoint(range_server, tmp_path):
+    url = f"http://127.0.0.1:{range_server.server_port}/"
+    NetworkOperationsPipe.fetch_to_file([url, str(tmp_path / "expected.txt")])
+    path = tmp_path / "page.txt"
+    path.write_text("")
+    checkpoint = {"offset": 2 * len(LARGE_PAGE), "written": 0, "etag": ETAG}
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(NetworkOperationsPipe.html_to_txt_pipeline(url, str(path), checkpoint))
+    assert checkpoint == {}
+    list(NetworkOperationsPipe.html_to_txt_pipeline(url, str(path), checkpoint))
+    assert path.read_text(encoding="utf-8") == (tmp_path / "expected.txt").read_text(encoding="utf-8")
+
+
+def test_saved_page_is_not_fetched_again_while_unchanged(range_server, tmp_path):
+    url = f"http://127.0.0.1:{range_server.server_port}/"
+    path = tmp_path / "page.txt"
+    checkpoint = {}
+    for _ in NetworkOperationsPipe.html_to_txt_pipeline(url, str(path), checkpoint):
+        pass
+    saved = path.read_text(encoding="utf-8")
+
+    restored = json.loads(json.dumps(checkpoint))
+    assert list(NetworkOperationsPipe.html_to_txt_pipeline(url, str(path), restored)) == []
+    assert range_server.seen[-1]["If-None-Match"] == ETAG
+    assert path.read_text(encoding="utf-8") == saved
@@ -39,9 +39,13 @@ def test_has_exceeded_max_time(mock_time):
     mock_time.return_value = initial_time
     max_working_time = 50
     job = Job(Mock(), "123", start_at=initial_time, max_working_time=max_working_time)
-    mock_time.return_value = initial_time + 30
+    # The clock starts with the first dispatch, not at creation
+    mock_time.return_value = initial_time + 500
     assert not job.has_exceeded_max_time()
-    mock_time.return_value = initial_time + max_working_time + 1
+    job.mark_started()
+    mock_time.return_value = initial_time + 500 + 30
+    assert not job.has_exceeded_max_time()
+    mock_time.return_value = initial_time + 500 + max_working_time + 1
     assert job.has_exceeded_max_time()
 
 
@@ -93,7 +97,7 @@ def test_scheduler_initialization():
 
 def test_scheduling_jobs():
     scheduler = Scheduler()
-    job = Mock()
+    job = Mock(priority=0, queue="default", executor=None)
     scheduler.schedule(job)
     assert len(scheduler.job_queue) == 1
     scheduler.add_job(job)
@@ -109,9 +113,12 @@ def test_run_logic(mock_job_class):
     mock_job.has_exceeded_max_time.return_value = False
     mock_job.has_failed_dependency.return_value = False
     mock_job.status = JobStatus.PENDING
+    mock_job.executor = None
+    mock_job.priority = 0
+    mock_job.queue = "default"
 
     # Set side effect to update job status to COMPLETED after being run
-    def side_effect_run():
+    def side_effect_run(*args):
         mock_job.status = JobStatus.COMPLETED
 
     mock_job.run.side_effect = side_effect_run
@@ -126,15 +133,16 @@ def test_run_logic(mock_job_class):
 @patch("os.path.exists", return_value=True)
 def test_load_save_jobs(mock_exists):
     scheduler = Scheduler()
-    mock_job = Mock()
-    mock_job.serialize.return_value = '{"job_id": "123"}'
+    mock_job = Mock(priority=0, queue="default", executor=None)
+    mock_job.dependencies = []
+    mock_job.to_record.return_value = {"job_id": "123"}
     scheduler.add_job(mock_job)
     scheduler.save_jobs()
     open.assert_called_with(scheduler.state_file, "w")
     written_content = open().write.call_args_list
     serialized_data = "".join(call_args[0][0] for call_args in written_content)
-    written_data = [json.loads(job) for job in json.loads(serialized_data)]
-    expected_data = [json.loads(mock_job.serialize.return_value)]
+    written_data = json.loads(serialized_data)
+    expected_data = [mock_job.to_record.return_value]
 
     assert written_data == expected_data
 
@@ -146,3 +154,132 @@ def test_restart_and_stop(mock_load_jobs, mock_stop):
     scheduler.restart()
     mock_stop.assert_called()
     mock_load_jobs.assert_called()
+
+
+def _single_step():
+    yield
+
+
+def test_delayed_job_sleeps_until_start_time():
+    clock = {"now": 1000.0}
+
+    def fake_sleep(seconds):
+        clock["now"] += seconds
+
+    with patch("time.time", side_effect=lambda: clock["now"]), patch("time.sleep", side_effect=fake_sleep) as sleep:
+        scheduler = Scheduler()
+        job = Job(_single_step, "delayed", start_at=1060)
+        scheduler.add_job(job)
+        assert len(scheduler.job_queue) == 0
+
+        scheduler.run()
+
+        sleep.assert_called_once_with(60)
+        assert job.status == JobStatus.COMPLETED
+
+
+def _failing_step():
+    raise ValueError("boom")
+    yield
+
+
+def test_dependent_job_becomes_ready_when_dependency_completes():
+    scheduler = Scheduler()
+    parent = Job(_single_step, "parent")
+    child = Job(_single_step, "child", dependencies=[parent])
+    scheduler.add_job(child)
+    assert len(scheduler.job_queue) == 0
+
+    scheduler.add_job(parent)
+    scheduler.run()
+
+    assert parent.status == JobStatus.COMPLETED
+    assert child.status == JobStatus.COMPLETED
+
+
+def test_dependency_failure_cascades_to_dependents():
+    scheduler = Scheduler()
+    parent = Job(_failing_step, "parent")
+    child_func = Mock()
+    child = Job(child_func, "child", dependencies=[parent])
+    grandchild = Job(child_func, "grandchild", dependencies=[child])
+    scheduler.add_job(grandchild)
+    scheduler.add_job(child)
+    scheduler.add_job(parent)
+
+    scheduler.run()
+
+    assert parent.status == JobStatus.FAILED
+    assert child.status == JobStatus.FAILED
+    assert grandchild.error == "Dependency failed"
+    child_func.assert_not_called()
+
+
+def test_cancel_leaves_dependents_blocked_for_a_replacement():
+    scheduler = Scheduler()
+    parent = Job(_single_step, "parent", start_at=time.time() + 3600)
+    child = Job(_single_step, "child", dependencies=[parent])
+    scheduler.add_job(child)
+    scheduler.add_job(parent)
+
+    assert scheduler.cancel("parent")
+    assert not scheduler.cancel("parent")
+    assert parent.error == "Cancelled"
+    assert child.status == JobStatus.PENDING
+
+    assert scheduler.cancel("child")
+    replacement = Job(_single_step, "parent")
+    scheduler.add_job(Job(_single_step, "child", dependencies=[replacement]))
+    scheduler.add_job(replacement)
+    scheduler.run()
+    assert replacement.status == JobStatus.COMPLETED
+    assert child.status == JobStatus.FAILED
+
+
+def test_failing_loop_callback_does_not_stop_the_loop():
+    scheduler = Scheduler()
+    calls = []
+
+    def failing():
+        calls.append("failing")
+        raise RuntimeError("boom")
+
+    def starter():
+        scheduler.run_in_loop(failing)
+        scheduler.run_in_loop(lambda: calls.append("after"))
+        yield
+
+    job = Job(starter, "starter")
+    later = Job(_single_step, "later", dependencies=[job])
+    scheduler.add_job(job)
+    scheduler.add_job(later)
+    scheduler.run()
+    assert calls == ["failing", "after"]
+    assert later.status == JobStatus.COMPLETED
+
+
+def test_job_uses_slots_and_creates_coroutine_lazily():
+    func = Mock()
+    job = Job(func, "123")
+    assert not hasattr(job, "__dict__")
+    func.assert_not_called()
+    job.coroutine_factory()
+    func.assert_called_once_with()
+
+
+def test_unknown_executor_is_rejected_on_the_way_in():
+    scheduler = Scheduler()
+    with pytest.raises(ValueError, match="Unknown executor: procss"):
+        scheduler.submit(Job(_single_step, "typo", executor="procss"))
+    with pytest.raises(ValueError, match="Unknown executor: procss"):
+        scheduler.add_job(Job(_single_step, "typo", executor="procss"))
+
+    # A job that got past the checks fails alone instead of stopping the loop
+    loaded = Job(_single_step, "loaded")
+    other = Job(_single_step, "other")
+    scheduler.add_job(loaded)
+    scheduler.add_job(other)
+    loaded.executor = "procss"
+    scheduler.run()
+    assert loaded.status == JobStatus.FAILED and loaded.error == "Unknown executor: procss"
+    assert other.status == JobStatus.COMPLETED
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from src.job import Job, JobStatus
+from src.job_store import JobStore
+from src.results import FileChannel, results_of
+from src.scheduler import Scheduler
+from src.utils import FileOperations, FileSystemOperations
+
+
+def _store(tmp_path, worker_id, **options):
+    return JobStore(str(tmp_path / "jobs.db"), worker_id=worker_id, **options)
+
+
+def test_claims_are_exclusive_between_workers(tmp_path):
+    first, second = _store(tmp_path, "first"), _store(tmp_path, "second")
+    for i in range(10):
+        first.add(Job(FileSystemOperations.create_file, f"job-{i}", args=[str(tmp_path / f"{i}.txt")], start_at=0))
+
+    claimed_first = {record["job_id"] for record in first.claim(6)}
+    claimed_second = {record["job_id"] for record in second.claim(6)}
+    assert len(claimed_first) == 6 and len(claimed_second) == 4
+    assert not claimed_first & claimed_second
+    assert second.claim(6) == []
+
+
+def test_expired_lease_is_reclaimed_and_late_result_dropped(tmp_path):
+    dead, alive = _store(tmp_path, "dead", lease_seconds=0), _store(tmp_path, "alive")
+    job = Job(FileSystemOperations.create_file, "job", args=[str(tmp_path / "a.txt")], start_at=0)
+    dead.add(job)
+    assert [record["job_id"] for record in dead.claim(1)] == ["job"]
+
+    assert [record["job_id"] for record in alive.claim(1)] == ["job"]
+    assert dead.complete(job) is False
+    assert alive.complete(job) is True
+    assert alive.counts() == {"COMPLETED": 1}
+
+
+def test_dependents_unblock_and_fail_across_workers(tmp_path):
+    first, second = _store(tmp_path, "first"), _store(tmp_path, "second")
+    upstream = Job(FileSystemOperations.create_file, "upstream", start_at=0)
+    downstream = Job(FileSystemOperations.create_file, "downstream", start_at=0, dependencies=[upstream])
+    broken = Job(FileSystemOperations.create_file, "broken", start_at=0)
+    orphan = Job(FileSystemOperations.create_file, "orphan", start_at=0, dependencies=[broken, downstream])
+    first.add(downstream)
+    first.add(orphan)
+
+    assert sorted(record["job_id"] for record in first.claim(10)) == ["broken", "upstream"]
+    assert second.claim(10) == []
+    first.complete(upstream)
+    assert [record["job_id"] for record in second.claim(10)] == ["downstream"]
+
+    first.fail(broken, "boom")
+    assert second.finished(["orphan"]) == {"orphan": (JobStatus.FAILED, "Dependency failed")}
+    assert second.has_unfinished()
+    second.complete(downstream)
+    assert not second.has_unfinished()
+
+
+def test_results_shared_through_the_store_need_a_file_channel(tmp_path):
+    store = _store(tmp_path, "worker")
+    read = Job(FileOperations.read_from_file, "read", args=[str(tmp_path / "source.txt")])
+    write = Job(FileOperations.write_lines, "write", args=[str(tmp_path / "copy.txt"), results_of("read")],
+                dependencies=[read])
+    with pytest.raises(ValueError, match="needs a FileChannel"):
+        store.add(write)
+    assert store.counts() == {}
+
+
+def test_schedulers_share_work_through_the_store(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("a\nb\n")
+    read = Job(
+        FileOperations.read_from_file, "read", args=[str(source)], results=FileChannel(str(tmp_path / "read.jsonl"))
+    )
+    write = Job(FileOperations.write_lines, "write", args=[str(tmp_path / "copy.txt"), results_of("read")],
+                dependencies=[read])
+    failing = Job(FileOperations.write_to_file, "failing", args=[str(tmp_path / "missing" / "x.txt"), "x"],
+                  max_tries=0)
+    after_failing = Job(FileSystemOperations.create_file, "after", args=[str(tmp_path / "after.txt")],
+                        dependencies=[failing])
+    files = [Job(FileSystemOperations.create_file, f"file-{i}", args=[str(tmp_path / f"{i}.txt")]) for i in range(20)]
+
+    workers = [
+        Scheduler(pool_size=2, state_file=str(tmp_path / f"state-{i}.json"), store=_store(tmp_path, f"worker-{i}"))
+        for i in range(2)
+    ]
+    handle = workers[0].submit(write)
+    for job in [after_failing, *files]:
+        workers[1].submit(job)
+
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert handle.wait(timeout=0)
+    assert handle.status == JobStatus.COMPLETED
+    assert (tmp_path / "copy.txt").read_text() == "a\nb\n"
+    assert all((tmp_path / f"{i}.txt").exists() for i in range(20))
+    assert not (tmp_path / "after.txt").exists()
+    assert workers[0]._store.counts() == {"COMPLETED": 22, "FAILED": 2}
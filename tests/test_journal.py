@@ -0,0 +1,74 @@
+import json
+
+from src.job import Job, JobStatus
+from src.journal import JobJournal, JournalEvent
+from src.scheduler import Scheduler
+from src.utils import FileSystemOperations, NetworkOperationsPipe
+
+
+def _directory_job(tmp_path, job_id, dependencies=None):
+    return Job(FileSystemOperations.create_directory, job_id, args=[str(tmp_path / job_id)], dependencies=dependencies)
+
+
+def test_replay_applies_journal_tail_after_crash(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    scheduler = Scheduler(state_file=state_file, journal=JobJournal(state_file))
+    first = _directory_job(tmp_path, "first")
+    second = _directory_job(tmp_path, "second", dependencies=[first])
+    scheduler.add_job(first)
+    scheduler.add_job(second)
+    scheduler._complete_job(first)
+    scheduler._journal.sync()
+
+    # A new scheduler recovers from the journal alone, without a clean stop()
+    recovered = Scheduler(state_file=state_file, journal=JobJournal(state_file))
+    recovered.load_jobs()
+
+    assert [job.job_id for job in recovered.job_queue] == ["second"]
+    second = next(iter(recovered.job_queue))
+    recovered.run()
+    assert second.status == JobStatus.COMPLETED
+    assert (tmp_path / "second").is_dir()
+
+
+def test_compaction_writes_snapshot_and_truncates_log(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    journal = JobJournal(state_file)
+    job = _directory_job(tmp_path, "job")
+    journal.record(JournalEvent.ENQUEUED, job)
+    journal.sync()
+
+    journal.compact([job])
+
+    with open(journal.wal_file) as file:
+        assert file.read() == ""
+    with open(state_file) as file:
+        assert [record["job_id"] for record in json.load(file)] == ["job"]
+    assert [data["job_id"] for data in journal.replay()] == ["job"]
+
+
+def test_replay_skips_torn_final_record(tmp_path):
+    journal = JobJournal(str(tmp_path / "state.json"))
+    job = _directory_job(tmp_path, "job")
+    journal.record(JournalEvent.ENQUEUED, job)
+    journal.record(JournalEvent.RUNNING, job)
+    journal.close()
+    with open(journal.wal_file, "a") as file:
+        file.write('{"event": "completed", "jo')
+
+    assert [data["status"] for data in journal.replay()] == ["RUNNING"]
+
+
+def test_retry_record_keeps_job_checkpoint(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    journal = JobJournal(state_file)
+    job = Job(NetworkOperationsPipe.html_to_txt_pipeline, "fetch", args=["http://example.test", "page.txt"])
+    journal.record(JournalEvent.ENQUEUED, job)
+    job.resolve_inputs()[1]["checkpoint"].update(offset=1024, written=512, etag='"v1"')
+    job.current_tries = 1
+    journal.record(JournalEvent.RETRY, job)
+    journal.sync()
+
+    [record] = JobJournal(state_file).replay()
+    assert record["checkpoint"] == {"offset": 1024, "written": 512, "etag": '"v1"'}
+    assert record["current_tries"] == 1
@@ -0,0 +1,27 @@
+import logging
+from logging.handlers import QueueHandler
+
+import config.logger
+from config.logger import setup_logging, stop_logging
+
+
+def test_setup_logging_moves_handlers_behind_a_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config.logger, "_configured", False)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        setup_logging()
+        setup_logging()  # configuration is applied only once
+        assert [type(handler) for handler in root.handlers] == [QueueHandler]
+
+        logging.getLogger("tests.logger").info("written by the listener thread")
+        stop_logging()
+
+        assert "written by the listener thread" in (tmp_path / "app.log").read_text()
+    finally:
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
@@ -0,0 +1,83 @@
+import asyncio
+import urllib.request
+
+from src.async_scheduler import AsyncScheduler
+from src.job import Job
+from src.metrics import MetricsRegistry, SchedulerMetrics
+from src.scheduler import Scheduler
+
+
+def _count(n):
+    for i in range(n):
+        yield i
+
+
+def _failing():
+    raise ValueError("boom")
+    yield
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    registry.describe("latency_seconds", "histogram", "Latency")
+    for value in (0.0001, 0.02, 0.02, 7.0):
+        registry.observe("latency_seconds", value, (("function", "f"),))
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{function="f",le="0.0005"} 1' in text
+    assert 'latency_seconds_bucket{function="f",le="0.05"} 3' in text
+    assert 'latency_seconds_bucket{function="f",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{function="f"} 4' in text
+
+
+def test_scheduler_counts_steps_retries_and_outcomes(tmp_path):
+    metrics = SchedulerMetrics(export_file=str(tmp_path / "metrics.prom"))
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), metrics=metrics)
+    scheduler.retry_policy.base_delay = 0
+    scheduler.add_job(Job(_count, "count", args=[3]))
+    scheduler.add_job(Job(_failing, "failing", max_tries=1))
+    scheduler.run()
+
+    registry = metrics.registry
+    assert registry.counter_value("job_steps_total", (("function", "_count"),)) == 3
+    assert registry.counter_value("job_retries_total", (("function", "_failing"),)) == 1
+    assert registry.counter_value("job_finished_total", (("function", "_count"), ("status", "completed"))) == 1
+    assert registry.counter_value("job_finished_total", (("function", "_failing"), ("status", "failed"))) == 1
+    assert registry.histogram("job_completion_seconds", (("function", "_count"),)).count == 1
+    assert registry.histogram("job_queue_wait_seconds", (("function", "_count"),)).count == 4
+
+    exported = (tmp_path / "metrics.prom").read_text()
+    assert "scheduler_ready_jobs 0" in exported
+    assert 'job_steps_total{function="_count"} 3.0' in exported
+
+
+async def _fetch():
+    await asyncio.sleep(0)
+    return "page"
+
+
+def test_async_scheduler_records_steps_and_dispatch_time(tmp_path):
+    metrics = SchedulerMetrics()
+    scheduler = AsyncScheduler(state_file=str(tmp_path / "state.json"), metrics=metrics)
+    scheduler.add_job(Job(_count, "count", args=[3]))
+    scheduler.add_job(Job(_fetch, "fetch"))
+    scheduler.run()
+
+    registry = metrics.registry
+    assert registry.counter_value("job_steps_total", (("function", "_count"),)) == 3
+    assert registry.counter_value("job_steps_total", (("function", "_fetch"),)) == 1
+    assert registry.histogram("job_dispatch_seconds", (("function", "_count"),)).count == 4
+    assert registry.histogram("job_dispatch_seconds", (("function", "_fetch"),)).count == 1
+
+
+def test_metrics_endpoint_serves_text_format():
+    metrics = SchedulerMetrics()
+    metrics.registry.inc("job_steps_total", (("function", "f"),), 2)
+    port = metrics.registry.serve(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode()
+    finally:
+        metrics.registry.close()
+    assert 'job_steps_total{function="f"} 2.0' in body
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from src.job import Job, JobStatus
+from src.ordering import CriticalPathPolicy
+from src.scheduler import Scheduler
+
+
+def _record(log, name):
+    log.append(name)
+    yield
+
+
+def _chain(log):
+    head = Job(_record, "head", args=[log, "head"])
+    middle = Job(_record, "middle", args=[log, "middle"], dependencies=[head])
+    tail = Job(_record, "tail", args=[log, "tail"], dependencies=[middle])
+    return head, middle, tail
+
+
+def test_rank_is_longest_downstream_path():
+    policy = CriticalPathPolicy(default_duration=1.0)
+    head, middle, tail = _chain([])
+    side = Job(_record, "side", args=[[], "side"], dependencies=[head])
+    for job in (head, middle, tail, side):
+        policy.add(job)
+    policy.durations["_record"] = 2.0
+
+    assert policy.rank(tail) == 2.0
+    assert policy.rank(head) == 6.0
+
+
+def test_critical_path_job_runs_before_earlier_independent_job():
+    log = []
+    scheduler = Scheduler(pool_size=1, ordering=CriticalPathPolicy())
+    with patch("time.time", return_value=1000.0):
+        independent = Job(_record, "independent", args=[log, "independent"])
+        head, middle, tail = _chain(log)
+        for job in (independent, head, middle, tail):
+            scheduler.add_job(job)
+        scheduler.run()
+
+    assert log[0] == "head"
+    assert tail.status == JobStatus.COMPLETED
+
+
+def test_finished_jobs_update_duration_history(tmp_path):
+    history_file = str(tmp_path / "durations.json")
+    policy = CriticalPathPolicy(smoothing=0.5, history_file=history_file)
+    job = Job(_record, "job", args=[[], "job"])
+    policy.add(job)
+    policy.record_step(job, 3.0)
+    policy.job_finished(job)
+    policy.save_history()
+
+    assert CriticalPathPolicy(history_file=history_file).estimate("_record") == 3.0
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from src.plan import PlanError, compile_plan, load_plan
+from src.task_manager import TaskManager
+
+
+def _config(*jobs):
+    return {"jobs": [dict(job, function=job.get("function", "create_file")) for job in jobs]}
+
+
+def test_plan_orders_forward_references_dependencies_first():
+    plan = compile_plan(_config(
+        {"id": "write", "function": "write_lines", "args": ["out.txt", {"results_of": "read"}]},
+        {"id": "read", "function": "read_from_file", "args": ["in.txt"], "dependencies": ["mkdir"]},
+        {"id": "mkdir", "function": "create_directory", "args": ["dir"]},
+        {"id": "other", "args": ["other.txt"]},
+    ))
+    assert [job["id"] for job in plan] == ["mkdir", "read", "write", "other"]
+    assert plan[2]["dependencies"] == ["read"]
+
+
+def test_plan_normalizes_integer_options():
+    plan = compile_plan(_config({"id": "a", "priority": "3", "start_at": 1.5}))
+    assert (plan[0]["priority"], plan[0]["start_at"], plan[0]["max_tries"]) == (3, 1, 1)
+
+
+@pytest.mark.parametrize("jobs, message", [
+    ([{"id": "a", "dependencies": ["b"]}, {"id": "b", "dependencies": ["c"]}, {"id": "c", "dependencies": ["b"]}],
+     "Dependency cycle: b -> c -> b"),
+    ([{"id": "a", "dependencies": ["missing"]}], "depends on unknown job missing"),
+    ([{"id": "a"}, {"id": "a"}], "Duplicate job id a"),
+    ([{"id": "a", "function": "no_such_function"}], "unknown function no_such_function"),
+    ([{"id": "a", "executor": "procss"}], "unknown executor procss"),
+    ([{"id": "a", "priority": "high"}], "'priority' must be an integer, not 'high'"),
+    ([{"id": "a", "start_at": [1]}], "'start_at' must be an integer"),
+    ([{"id": "a", "retry": {"retry_on": ["NoSuchError"]}}], "Unknown exception NoSuchError"),
+    ([{"id": "a", "retry": {"jitter_ratio": 2}}], "Invalid 'retry'"),
+    ([{"id": "a", "results": {"type": "file"}}], "'results' is missing 'path'"),
+    ([{"id": "a", "results": "out.jsonl"}], "'results' must be a mapping"),
+])
+def test_plan_rejects_invalid_files(jobs, message):
+    with pytest.raises(PlanError, match=message):
+        compile_plan(_config(*jobs))
+
+
+def test_compiled_plan_is_cached_by_file_hash(tmp_path):
+    yaml_file = tmp_path / "jobs.yaml"
+    yaml_file.write_text("jobs:\n  - id: a\n    function: create_file\n    args: [a.txt]\n")
+    assert [job["id"] for job in load_plan(str(yaml_file))] == ["a"]
+
+    cache_file = tmp_path / "jobs.yaml.plan.json"
+    cached = json.loads(cache_file.read_text())
+    cached["jobs"][0]["args"] = ["from-cache.txt"]
+    cache_file.write_text(json.dumps(cached))
+    assert load_plan(str(yaml_file))[0]["args"] == ["from-cache.txt"]
+
+    yaml_file.write_text("jobs:\n  - id: b\n    function: create_file\n    args: [b.txt]\n")
+    assert [job["id"] for job in load_plan(str(yaml_file))] == ["b"]
+
+
+def test_task_manager_keeps_yaml_ids(tmp_path):
+    yaml_file = tmp_path / "jobs.yaml"
+    yaml_file.write_text(
+        "jobs:\n"
+        f"  - id: file\n    function: create_file\n    args: [{tmp_path / 'dir' / 'a.txt'}]\n"
+        "    dependencies: [dir]\n"
+        f"  - id: dir\n    function: create_directory\n    args: [{tmp_path / 'dir'}]\n"
+    )
+    manager = TaskManager(str(yaml_file), executor="serial")
+    assert manager.jobs["file"].job_id == "file"
+    assert manager.jobs["file"].dependencies == (manager.jobs["dir"],)
+    manager.run()
+    assert (tmp_path / "dir" / "a.txt").exists()
+
+    yaml_file.write_text("jobs:\n  - id: a\n    function: create_file\n    dependencies: [a]\n")
+    with pytest.raises(RuntimeError) as error:
+        TaskManager(str(yaml_file))
+    assert "Dependency cycle: a -> a" in str(error.value.__cause__)
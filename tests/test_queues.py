@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from src.job import Job
+from src.queues import ReadyQueue
+
+
+def _step():
+    yield
+
+
+def _job(job_id, priority=0, queue="default"):
+    return Job(_step, job_id, priority=priority, queue=queue)
+
+
+@patch("time.time", return_value=1000.0)
+def test_higher_priority_runs_first_within_a_queue(_):
+    ready = ReadyQueue()
+    for job in [_job("low"), _job("high", priority=5), _job("mid", priority=1)]:
+        ready.append(job)
+
+    assert [ready.popleft().job_id for _ in range(3)] == ["high", "mid", "low"]
+
+
+def test_waiting_jobs_age_past_newer_higher_priority_jobs():
+    ready = ReadyQueue(aging_interval=10.0)
+    with patch("time.time", return_value=1000.0):
+        ready.append(_job("old", priority=0))
+    with patch("time.time", return_value=1030.0):
+        ready.append(_job("new", priority=2))
+        assert ready.popleft().job_id == "old"
+
+
+@patch("time.time", return_value=1000.0)
+def test_queues_share_dispatches_by_weight(_):
+    ready = ReadyQueue(weights={"interactive": 3, "batch": 1})
+    for i in range(8):
+        ready.append(_job(f"batch-{i}", queue="batch"))
+        ready.append(_job(f"interactive-{i}", queue="interactive"))
+
+    picked = [ready.popleft().queue for _ in range(8)]
+
+    assert picked.count("interactive") == 6
+    assert picked.count("batch") == 2
+    assert len(ready) == 8
+
+
+def test_wait_stats_report_percentiles_per_queue():
+    ready = ReadyQueue()
+    with patch("time.time", return_value=1000.0):
+        for i in range(10):
+            ready.append(_job(f"job-{i}", queue="batch"))
+    for i in range(10):
+        with patch("time.time", return_value=1000.0 + i):
+            ready.popleft()
+
+    stats = ready.wait_stats()["batch"]
+    assert stats["samples"] == 10
+    assert stats["p50"] == 4.0
+    assert stats["p99"] == 8.0
@@ -0,0 +1,135 @@
+from src.job import Job, JobRegistry, JobStatus
+import pytest
+
+from src.results import FileChannel, ResultsDroppedError, RingBufferChannel, results_of
+from src.scheduler import Scheduler
+from src.utils import FileOperations
+
+
+def _count(n):
+    for i in range(n):
+        yield i
+
+
+def _collect(values, stream):
+    values.extend(stream)
+    yield
+
+
+def _flaky(attempts):
+    attempts.append(None)
+    yield "partial"
+    if len(attempts) == 1:
+        raise ValueError("first try fails")
+    yield "done"
+
+
+def test_ring_buffer_counts_dropped_values():
+    channel = RingBufferChannel(capacity=3)
+    for i in range(5):
+        channel.put(i)
+    assert channel.dropped == 2
+    assert list(channel._values) == [2, 3, 4]
+    with pytest.raises(ResultsDroppedError):
+        channel.stream()
+
+
+def test_file_channel_streams_values_back(tmp_path):
+    channel = FileChannel(str(tmp_path / "results.jsonl"))
+    for value in ["a", {"b": 1}, 3]:
+        channel.put(value)
+    channel.close()
+    assert list(channel.stream()) == ["a", {"b": 1}, 3]
+
+
+def test_yielded_values_are_collected(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    job = Job(_count, "count", args=[3], results=RingBufferChannel())
+    scheduler.add_job(job)
+    scheduler.run()
+    # 0 is a value, only bare yields are skipped
+    assert list(job.stream_results()) == [0, 1, 2]
+
+
+def test_only_consumed_results_are_kept(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    unread = Job(_count, "unread", args=[3])
+    read = Job(_count, "read", args=[3])
+    values = []
+    consumer = Job(_collect, "consumer", args=[values, results_of("read")], dependencies=[read])
+    for job in (unread, read, consumer):
+        scheduler.add_job(job)
+    scheduler.run()
+    assert unread.results is None
+    assert values == [0, 1, 2]
+
+
+def test_consumer_fails_when_ring_buffer_dropped_results(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    producer = Job(_count, "producer", args=[3000])
+    values = []
+    consumer = Job(_collect, "consumer", args=[values, results_of("producer")], dependencies=[producer])
+    scheduler.add_job(producer)
+    scheduler.add_job(consumer)
+    scheduler.run()
+    assert producer.status == JobStatus.COMPLETED
+    assert consumer.status == JobStatus.FAILED
+    assert values == []
+    with pytest.raises(ResultsDroppedError, match="1976 results were dropped"):
+        producer.stream_results()
+
+
+def test_dependent_streams_upstream_lines(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("one\ntwo\nthree\n")
+    target = tmp_path / "target.txt"
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    reader = Job(FileOperations.read_from_file, "read", args=[str(source)],
+                 results=FileChannel(str(tmp_path / "read.jsonl")))
+    writer = Job(FileOperations.write_lines, "write", args=[str(target), results_of("read")], dependencies=[reader])
+    scheduler.add_job(writer)
+    scheduler.add_job(reader)
+    scheduler.run()
+
+    assert writer.status == JobStatus.COMPLETED
+    assert target.read_text() == "one\ntwo\nthree\n"
+
+
+def test_retry_discards_results_of_failed_try(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    scheduler.retry_policy.base_delay = 0
+    job = Job(_flaky, "flaky", args=[[]], max_tries=1, results=RingBufferChannel())
+    scheduler.add_job(job)
+    scheduler.run()
+    assert list(job.stream_results()) == ["partial", "done"]
+
+
+def test_channel_config_survives_serialization(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    job = Job(_count, "count", args=[2], results=FileChannel(path))
+    restored = Job.create_from_data(job.to_record(), lambda name: _count, JobRegistry())
+    assert isinstance(restored.results, FileChannel)
+    assert restored.results.path == path
+
+
+def test_consumer_of_reloaded_ring_buffer_fails(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("one\ntwo\n")
+    target = tmp_path / "target.txt"
+    state_file = str(tmp_path / "state.json")
+    reader = Job(FileOperations.read_from_file, "read", args=[str(source)])
+    writer = Job(FileOperations.write_lines, "write", args=[str(target), results_of("read")], dependencies=[reader])
+    first = Scheduler(state_file=state_file)
+    first.add_job(reader)
+    first.run()
+    assert reader.status == JobStatus.COMPLETED
+    first.add_job(writer)
+    first.save_jobs()
+
+    second = Scheduler(state_file=state_file)
+    second.load_jobs()
+    loaded = next(job for job in second.pending_jobs() if job.job_id == "write")
+    second.run()
+    assert loaded.status == JobStatus.FAILED
+    assert "not kept in memory" in loaded.error
+    assert not target.exists()
@@ -0,0 +1,69 @@
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from src.job import Job, JobRegistry, JobStatus
+from src.retry import RetryPolicy
+from src.scheduler import Scheduler
+
+
+def _failing_step(error):
+    raise error
+    yield
+
+
+def test_delay_grows_exponentially_up_to_cap():
+    policy = RetryPolicy(base_delay=1.0, factor=2.0, max_delay=5.0, jitter=0.0)
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_jitter_stays_below_full_delay():
+    policy = RetryPolicy(base_delay=4.0, jitter=0.5)
+    for _ in range(100):
+        assert 2.0 <= policy.delay(1) <= 4.0
+
+
+def test_policy_round_trips_through_job_record():
+    policy = RetryPolicy(base_delay=0.5, retry_on=(requests.exceptions.ConnectionError, TimeoutError))
+    job = Job(_failing_step, "job", args=[None], max_tries=3, retry_policy=policy)
+
+    restored = Job.create_from_data(job.to_record(), lambda name: _failing_step, JobRegistry())
+
+    assert restored.retry_policy.base_delay == 0.5
+    assert restored.retry_policy.retry_on == (requests.exceptions.ConnectionError, TimeoutError)
+
+
+@pytest.mark.parametrize("name, message", [
+    ("os.system", "not an exception class"),
+    ("NoSuchError", "Unknown exception"),
+    ("no_such_module.Error", "Unknown exception"),
+])
+def test_retry_on_accepts_only_exception_classes(name, message):
+    with pytest.raises(ValueError, match=message):
+        RetryPolicy.from_record({"retry_on": [name]})
+
+
+def test_retry_waits_in_delayed_heap(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), retry_policy=RetryPolicy(base_delay=30, jitter=0))
+    job = Job(_failing_step, "job", args=[ValueError("boom")], max_tries=2)
+    scheduler.add_job(job)
+
+    with patch("src.scheduler.Scheduler._wait_for_next_due_job", side_effect=lambda: scheduler._delayed_jobs.clear()):
+        scheduler.run()
+
+    assert job.current_tries == 1
+    assert job.status == JobStatus.PENDING
+    assert job.start_at >= time.time() + 29
+
+
+def test_unlisted_errors_fail_without_retry(tmp_path):
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"))
+    policy = RetryPolicy(base_delay=0, retry_on=(ConnectionError,))
+    job = Job(_failing_step, "job", args=[ValueError("boom")], max_tries=3, retry_policy=policy)
+    scheduler.add_job(job)
+    scheduler.run()
+
+    assert job.status == JobStatus.FAILED
+    assert job.current_tries == 0
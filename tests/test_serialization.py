@@ -0,0 +1,60 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from src.job import Job, JobRegistry, JobStatus
+from src.serialization import collect_graph, deserialize_graph, serialize_graph
+
+
+def _step():
+    yield
+
+
+def _diamond():
+    root = Job(_step, "root")
+    left = Job(_step, "left", dependencies=[root])
+    right = Job(_step, "right", dependencies=[root])
+    sink = Job(_step, "sink", dependencies=[left, right])
+    return root, left, right, sink
+
+
+def test_collect_graph_writes_each_job_once_dependencies_first():
+    root, left, right, sink = _diamond()
+    assert [job.job_id for job in collect_graph([sink, left])] == ["root", "left", "right", "sink"]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_graph_round_trip_links_shared_dependencies(binary):
+    root, _, _, sink = _diamond()
+    root.status = JobStatus.COMPLETED
+    payload = serialize_graph([sink], binary=binary)
+
+    jobs = deserialize_graph(payload, Mock(return_value=_step), JobRegistry())
+
+    by_id = {job.job_id: job for job in jobs}
+    assert set(by_id) == {"root", "left", "right", "sink"}
+    assert [dep.job_id for dep in by_id["sink"].dependencies] == ["left", "right"]
+    assert by_id["left"].dependencies[0] is by_id["right"].dependencies[0]
+    assert by_id["root"].status == JobStatus.COMPLETED
+
+
+def test_legacy_nested_records_are_still_readable():
+    legacy_dependency = json.dumps(json.loads(Job(_step, "dep").serialize()))
+    legacy = json.loads(Job(_step, "job").serialize())
+    legacy["dependencies"] = [legacy_dependency]
+
+    jobs = deserialize_graph(json.dumps([json.dumps(legacy)]), Mock(return_value=_step), JobRegistry())
+
+    assert [dep.job_id for dep in jobs[0].dependencies] == ["dep"]
+
+
+def test_text_format_stores_records_as_objects():
+    _, _, _, sink = _diamond()
+    payload = serialize_graph([sink])
+    assert all(isinstance(entry, dict) for entry in json.loads(payload))
+
+    # State files of one JSON string per job are still read
+    old_payload = json.dumps([json.dumps(entry) for entry in json.loads(payload)])
+    jobs = deserialize_graph(old_payload, lambda name: _step, JobRegistry())
+    assert [job.job_id for job in jobs] == ["root", "left", "right", "sink"]
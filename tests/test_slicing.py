@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from src.executors import SerialExecutor
+from src.job import Job, JobStatus
+from src.results import RingBufferChannel
+from src.scheduler import Scheduler
+from src.slicing import SlicePolicy
+
+
+def _count(n):
+    for i in range(n):
+        yield i
+
+
+def _slow_steps(n, delay):
+    for i in range(n):
+        time.sleep(delay)
+        yield i
+
+
+class CountingExecutor(SerialExecutor):
+    def __init__(self):
+        super().__init__()
+        self.dispatches = 0
+
+    def submit(self, job, max_steps=1, time_slice=None):
+        self.dispatches += 1
+        return super().submit(job, max_steps, time_slice)
+
+
+def test_run_advances_up_to_step_budget():
+    job = Job(_count, "count", args=[12], results=RingBufferChannel())
+    assert job.run(max_steps=5) == 5
+    assert list(job.stream_results()) == [0, 1, 2, 3, 4]
+
+
+def test_time_slice_cuts_dispatch_short():
+    job = Job(_slow_steps, "slow", args=[100, 0.01])
+    steps = job.run(max_steps=100, time_slice=0.025)
+    assert 1 <= steps < 10
+
+
+def test_step_budget_reduces_dispatches(tmp_path):
+    executor = CountingExecutor()
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), executor=executor, slicing=SlicePolicy(max_steps=50))
+    job = Job(_count, "count", args=[1000])
+    scheduler.add_job(job)
+    scheduler.run()
+
+    assert job.status == JobStatus.COMPLETED
+    # 20 full slices plus the dispatch that sees the generator finish
+    assert executor.dispatches == 21
+
+
+def test_adaptive_budget_grows_for_cheap_steps(tmp_path):
+    slicing = SlicePolicy(max_steps=256, time_slice=0.05, adaptive=True)
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), slicing=slicing)
+    scheduler.add_job(Job(_count, "count", args=[5000]))
+    scheduler.run()
+    assert slicing.budget(Job(_count, "other"))[0] > 100
+
+
+def test_time_slice_alone_lifts_step_limit(tmp_path):
+    assert SlicePolicy().budget(Job(_count, "count")) == (1, None)
+    slicing = SlicePolicy(time_slice=0.05, adaptive=True)
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), slicing=slicing)
+    scheduler.add_job(Job(_count, "count", args=[5000]))
+    scheduler.run()
+    assert slicing.budget(Job(_count, "other"))[0] > 1
+
+
+def test_adaptive_needs_time_slice():
+    with pytest.raises(ValueError):
+        SlicePolicy(adaptive=True)
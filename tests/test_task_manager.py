@@ -0,0 +1,129 @@
+import time
+import threading
+
+from src.job import JobStatus
+from src.task_manager import TaskManager
+
+
+def _write_jobs(path, jobs):
+    lines = ["jobs:"]
+    for job_id, function, args, extra in jobs:
+        lines += [f"  - id: {job_id}", f"    function: {function}", f"    args: [{', '.join(map(str, args))}]"]
+        lines += [f"    {line}" for line in extra]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_reload_replaces_only_changed_jobs(tmp_path):
+    yaml_file = tmp_path / "jobs.yaml"
+    _write_jobs(yaml_file, [
+        ("dir", "create_directory", [tmp_path / "dir"], []),
+        ("a", "create_file", [tmp_path / "dir" / "a.txt"], ["dependencies: [dir]"]),
+        ("later", "create_file", [tmp_path / "later.txt"], ["start_at: 3600"]),
+        ("after_later", "create_file", [tmp_path / "after.txt"], ["dependencies: [later]"]),
+        ("gone", "create_file", [tmp_path / "gone.txt"], ["start_at: 3600"]),
+    ])
+    manager = TaskManager(str(yaml_file), executor="serial")
+    kept = dict(manager.jobs)
+
+    _write_jobs(yaml_file, [
+        ("dir", "create_directory", [tmp_path / "dir"], []),
+        ("a", "create_file", [tmp_path / "dir" / "a.txt"], ["dependencies: [dir]"]),
+        ("later", "create_file", [tmp_path / "later.txt"], []),
+        ("after_later", "create_file", [tmp_path / "after.txt"], ["dependencies: [later]"]),
+        ("new", "create_file", [tmp_path / "new.txt"], ["dependencies: [a]"]),
+    ])
+    manager.reload()
+
+    assert manager.jobs["dir"] is kept["dir"] and manager.jobs["a"] is kept["a"]
+    assert manager.jobs["later"] is not kept["later"] and manager.jobs["after_later"] is not kept["after_later"]
+    assert "gone" not in manager.jobs and kept["gone"].error == "Cancelled"
+    assert kept["after_later"].error == "Cancelled"
+
+    manager.scheduler.run()
+    assert all(job.status == JobStatus.COMPLETED for job in manager.jobs.values())
+    assert (tmp_path / "after.txt").exists() and (tmp_path / "new.txt").exists()
+    assert not (tmp_path / "gone.txt").exists()
+
+    # Finished jobs are kept unless their own definition changes
+    finished = dict(manager.jobs)
+    _write_jobs(yaml_file, [
+        ("dir", "create_directory", [tmp_path / "dir"], []),
+        ("a", "create_file", [tmp_path / "dir" / "b.txt"], ["dependencies: [dir]"]),
+        ("later", "create_file", [tmp_path / "later.txt"], []),
+        ("after_later", "create_file", [tmp_path / "after.txt"], ["dependencies: [later]"]),
+        ("new", "create_file", [tmp_path / "new.txt"], ["dependencies: [a]"]),
+    ])
+    manager.reload()
+    assert [job_id for job_id, job in manager.jobs.items() if job is not finished[job_id]] == ["a"]
+    manager.scheduler.run()
+    assert (tmp_path / "dir" / "b.txt").exists()
+
+
+def test_failed_reload_keeps_current_jobs(tmp_path, monkeypatch):
+    yaml_file = tmp_path / "jobs.yaml"
+    jobs = [
+        ("a", "create_file", [tmp_path / "a.txt"], ["start_at: 3600"]),
+        ("b", "create_file", [tmp_path / "b.txt"], ["start_at: 3600"]),
+    ]
+    _write_jobs(yaml_file, jobs)
+    manager = TaskManager(str(yaml_file), executor="serial")
+    kept = dict(manager.jobs)
+
+    _write_jobs(yaml_file, [jobs[0][:3] + (["priority: high"],)])
+    manager.reload()
+    assert manager.jobs == kept
+    assert all(job.error is None for job in kept.values())
+
+    # Building the new jobs fails after the file compiled; "b" must not have been cancelled by then
+    _write_jobs(yaml_file, [jobs[0][:3] + (["start_at: 7200"],)])
+    build = manager.create_job_from_config
+
+    def failing_build(config, jobs=None):
+        if config["id"] == "a":
+            raise ValueError("cannot build a")
+        return build(config, jobs)
+
+    monkeypatch.setattr(manager, "create_job_from_config", failing_build)
+    manager.reload()
+    assert manager.jobs == kept
+    assert all(job.error is None for job in kept.values())
+
+
+def test_reloaded_consumer_of_finished_producer_fails(tmp_path):
+    yaml_file = tmp_path / "jobs.yaml"
+    source = tmp_path / "source.txt"
+    source.write_text("one\ntwo\n")
+    read = ("read", "read_from_file", [source], [])
+    _write_jobs(yaml_file, [read])
+    manager = TaskManager(str(yaml_file), executor="serial")
+    manager.scheduler.run()
+
+    _write_jobs(yaml_file, [read, ("write", "write_lines", [tmp_path / "copy.txt", "{results_of: read}"], [])])
+    manager.reload()
+    manager.scheduler.run()
+    assert manager.jobs["read"].status == JobStatus.COMPLETED
+    assert manager.jobs["write"].status == JobStatus.FAILED
+    assert not (tmp_path / "copy.txt").exists()
+
+
+def test_watched_file_changes_are_applied_while_running(tmp_path):
+    yaml_file = tmp_path / "jobs.yaml"
+    _write_jobs(yaml_file, [("first", "create_file", [tmp_path / "first.txt"], [])])
+    manager = TaskManager(str(yaml_file), executor="serial")
+    runner = threading.Thread(target=manager.run, kwargs={"watch_interval": 0.01})
+    runner.start()
+    try:
+        _write_jobs(yaml_file, [
+            ("first", "create_file", [tmp_path / "first.txt"], []),
+            ("second", "create_file", [tmp_path / "second.txt"], ["dependencies: [first]"]),
+        ])
+        deadline = time.time() + 10
+        while not (tmp_path / "second.txt").exists() and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        manager.stop()
+        runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    assert (tmp_path / "second.txt").exists()
+    assert manager.jobs["first"].status == JobStatus.COMPLETED
@@ -0,0 +1,50 @@
+import json
+import os
+
+from src import tracing
+from src.job import Job
+from src.scheduler import Scheduler
+from src.tracing import TraceRecorder
+
+
+def _count(n):
+    for i in range(n):
+        yield i
+
+
+def _events(path, **match):
+    with open(path) as file:
+        events = json.load(file)["traceEvents"]
+    return [event for event in events if all(event.get(key) == value for key, value in match.items())]
+
+
+def test_trace_has_state_and_step_spans_per_job(tmp_path):
+    trace_file = str(tmp_path / "trace.json")
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), trace=TraceRecorder(trace_file))
+    parent = Job(_count, "parent", args=[2])
+    child = Job(_count, "child", args=[1], dependencies=[parent])
+    scheduler.add_job(child)
+    scheduler.add_job(parent)
+    scheduler.run()
+
+    tracks = {event["args"]["name"]: event["tid"] for event in _events(trace_file, name="thread_name", pid=1)}
+    child_spans = [event["name"] for event in _events(trace_file, ph="X", tid=tracks["_count child"])]
+    assert child_spans[0] == "blocked"
+    assert {"ready", "running", "step"} <= set(child_spans)
+    # Two yields plus the send that finishes the generator
+    assert len(_events(trace_file, name="step", tid=tracks["_count parent"])) == 3
+    assert len(_events(trace_file, name="completed")) == 2
+    assert tracing.active_tracer is None
+
+
+def test_worker_tracks_and_sampled_profiles(tmp_path):
+    trace_file = str(tmp_path / "trace.json")
+    recorder = TraceRecorder(trace_file, tracks="worker", profile_functions=["_count"])
+    scheduler = Scheduler(state_file=str(tmp_path / "state.json"), executor="thread", trace=recorder)
+    scheduler.add_job(Job(_count, "job", args=[3]))
+    scheduler.run()
+    scheduler._executor.shutdown()
+
+    steps = _events(trace_file, name="step")
+    assert steps and all(event["pid"] == tracing.WORKERS_PID for event in steps)
+    assert os.path.exists(trace_file + "._count.prof")
@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock, patch
+
+from src.utils import ChunkHTMLParser, NetworkOperationsPipe
+
+
+def test_parser_pop_data_returns_only_new_text():
+    parser = ChunkHTMLParser()
+    parser.feed("<p>first</p><script>skip()</script>")
+    assert parser.pop_data() == "first"
+    assert parser.text_parts == []
+    parser.feed("<p>sec")
+    assert parser.pop_data() == ""
+    parser.feed("ond</p>")
+    assert parser.pop_data() == " second"
+    assert parser.pop_data() == ""
+
+
+def test_clean_html_chunks_writes_each_text_part_once(tmp_path):
+    path = tmp_path / "out.txt"
+    pipe = NetworkOperationsPipe.clean_html_chunks()
+    pipe.send(str(path))
+    for chunk in ["<html><body><p>one</p>", "<p>two</p><p>th", "ree</p></body></html>"]:
+        pipe.send(chunk)
+    pipe.close()
+
+    assert path.read_text() == "one two three"
+
+
+def test_pipeline_decodes_multibyte_characters_split_across_chunks(tmp_path):
+    path = tmp_path / "out.txt"
+    response = MagicMock()
+    response.iter_content.return_value = [b"<p>caf\xc3", b"\xa9 cr\xc3\xa8", b"me</p>"]
+
+    client = MagicMock()
+    client.get.return_value.__enter__.return_value = response
+
+    with patch("src.utils.get_http_client", return_value=client):
+        for _ in NetworkOperationsPipe.html_to_txt_pipeline("http://example.test", str(path)):
+            pass
+
+    assert path.read_text(encoding="utf-8") == "café crème"